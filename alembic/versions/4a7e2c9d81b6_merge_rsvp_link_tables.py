@@ -0,0 +1,74 @@
+"""merge rsvp link tables
+
+Revision ID: 4a7e2c9d81b6
+Revises: b3e8d51c0f27
+Create Date: 2026-10-16 11:22:53.806412
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision = '4a7e2c9d81b6'
+down_revision = 'b3e8d51c0f27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('user_game_session_event_rsvps',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('event_attendance_id', sa.Integer(), nullable=False),
+    sa.Column('attending', sa.Boolean(), nullable=False),
+    sa.ForeignKeyConstraint(['event_attendance_id'], ['game_session_event.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'event_attendance_id')
+    )
+
+    # Carry over the existing RSVPs, a "yes" wins if a user somehow ended up in both tables
+    op.execute(
+        """
+        INSERT INTO user_game_session_event_rsvps (user_id, event_attendance_id, attending)
+        SELECT user_id, event_attendance_id, true FROM user_game_session_event_rsvp_yes_link
+        UNION ALL
+        SELECT user_id, event_attendance_id, false FROM user_game_session_event_rsvp_no_link
+        ON CONFLICT (user_id, event_attendance_id) DO NOTHING
+        """
+    )
+
+    op.drop_table('user_game_session_event_rsvp_yes_link')
+    op.drop_table('user_game_session_event_rsvp_no_link')
+
+
+def downgrade() -> None:
+    op.create_table('user_game_session_event_rsvp_no_link',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('event_attendance_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['event_attendance_id'], ['game_session_event.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'event_attendance_id')
+    )
+    op.create_table('user_game_session_event_rsvp_yes_link',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('event_attendance_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['event_attendance_id'], ['game_session_event.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'event_attendance_id')
+    )
+
+    op.execute(
+        """
+        INSERT INTO user_game_session_event_rsvp_yes_link (user_id, event_attendance_id)
+        SELECT user_id, event_attendance_id FROM user_game_session_event_rsvps WHERE attending
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO user_game_session_event_rsvp_no_link (user_id, event_attendance_id)
+        SELECT user_id, event_attendance_id FROM user_game_session_event_rsvps WHERE NOT attending
+        """
+    )
+
+    op.drop_table('user_game_session_event_rsvps')
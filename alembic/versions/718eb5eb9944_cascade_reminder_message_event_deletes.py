@@ -0,0 +1,37 @@
+"""cascade reminder message event deletes
+
+Revision ID: 718eb5eb9944
+Revises: 367bbe5abf39
+Create Date: 2026-10-16 09:12:41.118203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision = '718eb5eb9944'
+down_revision = '367bbe5abf39'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('event_attendance_reminder_discord_messages', schema=None) as batch_op:
+        batch_op.drop_constraint('event_attendance_reminder_discord_me_game_session_event_id_fkey', type_='foreignkey')
+        batch_op.create_foreign_key('event_attendance_reminder_discord_me_game_session_event_id_fkey', 'game_session_event', ['game_session_event_id'], ['id'], ondelete='CASCADE')
+
+    with op.batch_alter_table('event_food_reminder_discord_messages', schema=None) as batch_op:
+        batch_op.drop_constraint('event_food_reminder_discord_messages_game_session_event_id_fkey', type_='foreignkey')
+        batch_op.create_foreign_key('event_food_reminder_discord_messages_game_session_event_id_fkey', 'game_session_event', ['game_session_event_id'], ['id'], ondelete='CASCADE')
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('event_food_reminder_discord_messages', schema=None) as batch_op:
+        batch_op.drop_constraint('event_food_reminder_discord_messages_game_session_event_id_fkey', type_='foreignkey')
+        batch_op.create_foreign_key('event_food_reminder_discord_messages_game_session_event_id_fkey', 'game_session_event', ['game_session_event_id'], ['id'])
+
+    with op.batch_alter_table('event_attendance_reminder_discord_messages', schema=None) as batch_op:
+        batch_op.drop_constraint('event_attendance_reminder_discord_me_game_session_event_id_fkey', type_='foreignkey')
+        batch_op.create_foreign_key('event_attendance_reminder_discord_me_game_session_event_id_fkey', 'game_session_event', ['game_session_event_id'], ['id'])
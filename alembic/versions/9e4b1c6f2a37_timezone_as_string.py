@@ -0,0 +1,43 @@
+"""timezone as string
+
+Revision ID: 9e4b1c6f2a37
+Revises: c7d2a94e5b18
+Create Date: 2026-10-16 15:21:47.913502
+
+"""
+from alembic import op
+import pytz
+import sqlalchemy as sa
+import sqlmodel
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '9e4b1c6f2a37'
+down_revision = 'c7d2a94e5b18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('groups', schema=None) as batch_op:
+        batch_op.alter_column('timezone',
+               existing_type=postgresql.ENUM(name='timezone', create_type=False),
+               type_=sqlmodel.sql.sqltypes.AutoString(),
+               existing_nullable=False,
+               postgresql_using='timezone::text')
+
+    sa.Enum(name='timezone').drop(op.get_bind())
+
+
+def downgrade() -> None:
+    # Groups may hold any timezone pytz knows (not just the common ones the original enum had), so all of them are
+    # included to keep the cast below from failing
+    sa.Enum(*pytz.all_timezones, name='timezone').create(op.get_bind())
+
+    with op.batch_alter_table('groups', schema=None) as batch_op:
+        batch_op.alter_column('timezone',
+               existing_type=sqlmodel.sql.sqltypes.AutoString(),
+               type_=postgresql.ENUM(name='timezone', create_type=False),
+               existing_nullable=False,
+               postgresql_using='timezone::timezone')
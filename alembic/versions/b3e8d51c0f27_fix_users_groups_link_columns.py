@@ -0,0 +1,36 @@
+"""fix users groups link columns
+
+Revision ID: b3e8d51c0f27
+Revises: 9c1f4b2a7d3e
+Create Date: 2026-10-16 10:41:09.274615
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3e8d51c0f27'
+down_revision = '9c1f4b2a7d3e'
+branch_labels = None
+depends_on = None
+
+
+def _swap_link_columns() -> None:
+    # The link table was created with its column names swapped relative to their foreign keys (`group_id` pointed at
+    # `users.id` and `user_id` at `groups.id`), so swap the names to match the data they actually hold.
+    op.execute("ALTER TABLE users_groups_link RENAME COLUMN group_id TO tmp_id")
+    op.execute("ALTER TABLE users_groups_link RENAME COLUMN user_id TO group_id")
+    op.execute("ALTER TABLE users_groups_link RENAME COLUMN tmp_id TO user_id")
+    op.execute("ALTER TABLE users_groups_link RENAME CONSTRAINT users_groups_link_group_id_fkey TO tmp_fkey")
+    op.execute("ALTER TABLE users_groups_link RENAME CONSTRAINT users_groups_link_user_id_fkey TO users_groups_link_group_id_fkey")
+    op.execute("ALTER TABLE users_groups_link RENAME CONSTRAINT tmp_fkey TO users_groups_link_user_id_fkey")
+
+
+def upgrade() -> None:
+    _swap_link_columns()
+
+
+def downgrade() -> None:
+    _swap_link_columns()
@@ -0,0 +1,29 @@
+"""cascade rsvp event deletes
+
+Revision ID: c7d2a94e5b18
+Revises: 5d0b8f3e6a12
+Create Date: 2026-10-16 14:02:11.408213
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7d2a94e5b18'
+down_revision = '5d0b8f3e6a12'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('user_game_session_event_rsvps', schema=None) as batch_op:
+        batch_op.drop_constraint('user_game_session_event_rsvps_event_attendance_id_fkey', type_='foreignkey')
+        batch_op.create_foreign_key('user_game_session_event_rsvps_event_attendance_id_fkey', 'game_session_event', ['event_attendance_id'], ['id'], ondelete='CASCADE')
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('user_game_session_event_rsvps', schema=None) as batch_op:
+        batch_op.drop_constraint('user_game_session_event_rsvps_event_attendance_id_fkey', type_='foreignkey')
+        batch_op.create_foreign_key('user_game_session_event_rsvps_event_attendance_id_fkey', 'game_session_event', ['event_attendance_id'], ['id'])
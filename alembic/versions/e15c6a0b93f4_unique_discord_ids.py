@@ -0,0 +1,148 @@
+"""unique discord ids
+
+Revision ID: e15c6a0b93f4
+Revises: 4a7e2c9d81b6
+Create Date: 2026-10-16 12:03:18.640529
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision = 'e15c6a0b93f4'
+down_revision = '4a7e2c9d81b6'
+branch_labels = None
+depends_on = None
+
+
+# Rows that point at a merged row.  Tables where the column is part of the primary key list their other columns, so the
+# rows are copied to the surviving row (skipping ones it already has) rather than updated in place.
+_USER_REFERENCES = [
+    ('game_session_event', 'user_assigned_food_id', None),
+    ('users_groups_link', 'user_id', ('group_id',)),
+    ('user_game_session_event_rsvps', 'user_id', ('event_attendance_id', 'attending')),
+]
+_GROUP_REFERENCES = [
+    ('game_session_event', 'group_id', None),
+    ('users_groups_link', 'group_id', ('user_id',)),
+]
+_GAME_SESSION_EVENT_REFERENCES = [
+    ('user_game_session_event_rsvps', 'event_attendance_id', ('user_id', 'attending')),
+    ('event_food_reminder_discord_messages', 'game_session_event_id', None),
+    ('event_attendance_reminder_discord_messages', 'game_session_event_id', None),
+]
+
+
+def _duplicates(table: str, discord_id_column: str, order_by: str = 'id') -> str:
+    """Select each duplicate row's id along with the id of the row it is merged into (the first by `order_by`)."""
+    return f"""
+        SELECT id, keep_id FROM (
+            SELECT id, first_value(id) OVER (PARTITION BY {discord_id_column} ORDER BY {order_by}) AS keep_id
+            FROM {table}
+            WHERE {discord_id_column} IS NOT NULL
+        ) ranked
+        WHERE id <> keep_id
+    """
+
+
+def _merge_rows(table: str, duplicates: str, references: list[tuple[str, str, tuple[str, ...] | None]]) -> None:
+    """Point the references of each duplicate row at the row it is merged into, then delete the duplicates."""
+    op.execute(f"CREATE TEMPORARY TABLE merged_rows AS {duplicates}")
+
+    for ref_table, ref_column, other_columns in references:
+        if other_columns is None:
+            op.execute(
+                f"UPDATE {ref_table} SET {ref_column} = merged_rows.keep_id "
+                f"FROM merged_rows WHERE {ref_table}.{ref_column} = merged_rows.id"
+            )
+        else:
+            columns = ', '.join(other_columns)
+            selected_columns = ', '.join(f'ref.{column}' for column in other_columns)
+            op.execute(
+                f"INSERT INTO {ref_table} ({ref_column}, {columns}) "
+                f"SELECT merged_rows.keep_id, {selected_columns} "
+                f"FROM {ref_table} ref JOIN merged_rows ON ref.{ref_column} = merged_rows.id "
+                f"ON CONFLICT DO NOTHING"
+            )
+            op.execute(f"DELETE FROM {ref_table} USING merged_rows WHERE {ref_table}.{ref_column} = merged_rows.id")
+
+    op.execute(f"DELETE FROM {table} USING merged_rows WHERE {table}.id = merged_rows.id")
+    op.execute("DROP TABLE merged_rows")
+
+
+def _merge_duplicate_discord_ids() -> None:
+    """
+    Merge rows that share a discord id, which the old select-then-insert get-or-create could create under concurrent
+    interactions, so the unique indexes can be built.  The oldest row survives and everything pointing at the others is
+    moved to it.  This can not be undone by the downgrade.
+    """
+    _merge_rows('users', _duplicates('users', 'discord_member_id'), _USER_REFERENCES)
+
+    # Merging groups moves their game session events, so events that would then share a group and timestamp (which is
+    # unique) are merged first, keeping the surviving group's event.
+    _merge_rows(
+        'game_session_event',
+        f"""
+        SELECT id, keep_id FROM (
+            SELECT
+                game_session_event.id,
+                first_value(game_session_event.id) OVER (
+                    PARTITION BY
+                        coalesce(duplicate_groups.keep_id, game_session_event.group_id),
+                        game_session_event.timestamp
+                    ORDER BY duplicate_groups.id IS NOT NULL, game_session_event.id
+                ) AS keep_id
+            FROM game_session_event
+            LEFT JOIN ({_duplicates('groups', 'discord_guild_id')}) duplicate_groups
+                ON game_session_event.group_id = duplicate_groups.id
+        ) ranked
+        WHERE id <> keep_id
+        """,
+        _GAME_SESSION_EVENT_REFERENCES,
+    )
+    _merge_rows('groups', _duplicates('groups', 'discord_guild_id'), _GROUP_REFERENCES)
+
+    # Channels have nothing pointing at them, so the one that has an assistant thread is kept when there is one
+    _merge_rows(
+        'discord_text_channels',
+        _duplicates('discord_text_channels', 'discord_channel_id', order_by='assistant_thread_id IS NULL, id'),
+        [],
+    )
+
+
+def upgrade() -> None:
+    _merge_duplicate_discord_ids()
+
+    # ### commands auto generated by Alembic - please adjust! ###
+    with op.batch_alter_table('discord_text_channels', schema=None) as batch_op:
+        batch_op.drop_index('ix_discord_text_channels_discord_channel_id')
+        batch_op.create_index(batch_op.f('ix_discord_text_channels_discord_channel_id'), ['discord_channel_id'], unique=True)
+
+    with op.batch_alter_table('groups', schema=None) as batch_op:
+        batch_op.drop_index('ix_groups_discord_guild_id')
+        batch_op.create_index(batch_op.f('ix_groups_discord_guild_id'), ['discord_guild_id'], unique=True)
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index('ix_users_discord_member_id')
+        batch_op.create_index(batch_op.f('ix_users_discord_member_id'), ['discord_member_id'], unique=True)
+
+    # ### end Alembic commands ###
+
+
+def downgrade() -> None:
+    # ### commands auto generated by Alembic - please adjust! ###
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_users_discord_member_id'))
+        batch_op.create_index('ix_users_discord_member_id', ['discord_member_id'], unique=False)
+
+    with op.batch_alter_table('groups', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_groups_discord_guild_id'))
+        batch_op.create_index('ix_groups_discord_guild_id', ['discord_guild_id'], unique=False)
+
+    with op.batch_alter_table('discord_text_channels', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_discord_text_channels_discord_channel_id'))
+        batch_op.create_index('ix_discord_text_channels_discord_channel_id', ['discord_channel_id'], unique=False)
+
+    # ### end Alembic commands ###
@@ -8,7 +8,7 @@ import typer
 from loguru import logger
 
 from grug.bot_discord import discord_client
-from grug.db import init_db
+from grug.db import init_db, warm_db_pool
 from grug.scheduler import start_scheduler
 from grug.settings import settings
 
@@ -48,6 +48,7 @@ async def main():
         raise ValueError("`OPENAI_KEY` env variable is required to run the Grug bot.")
 
     init_db()
+    await warm_db_pool()
 
     logger.info("Starting Grug...")
     try:
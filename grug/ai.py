@@ -1,12 +1,19 @@
 """Integration to OpenAI for interacting with the OpenAI API. """
 
 import asyncio
+import functools
 import inspect
-import json
+import re
+import time
+from typing import Any, Callable, ClassVar
 
 import discord
+import httpx
+import pydantic_core
 from loguru import logger
-from openai import AsyncOpenAI, OpenAI
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+from openai.types.beta import Assistant as OpenAIAssistant
+from openai.types.beta.threads import RequiredActionFunctionToolCall
 from pydantic import BaseModel
 
 from grug.db import async_session
@@ -18,8 +25,6 @@ from grug.models_crud import (
 )
 from grug.settings import settings
 
-# TODO: setup monitor/log/handle openai rate limits:
-#       https://platform.openai.com/docs/guides/rate-limits/rate-limits-in-headers
 # TODO: log/track cost/usage of openai to a table to track costs and usage (having a TTL based chat history log would
 #       be nice too, to help with debugging and whatnot)
 # TODO: configure file uploading for the assistant and load useful files for the assistant to use.
@@ -28,6 +33,81 @@ from grug.settings import settings
 #       - pathfinder wizard class information
 
 
+_OPENAI_TYPE_MAP = {
+    str: "string",
+    int: "integer",
+    float: "number",
+    bool: "boolean",
+}
+
+# Tool arguments that are filled in by the assistant rather than by the AI
+_IGNORED_TOOL_ARGS = ["message"]
+
+
+@functools.cache
+def get_tool_schema(function: Callable[..., Any]) -> dict:
+    """Get the OpenAI tool schema for an assistant function, built once per function."""
+    parameters = inspect.signature(function).parameters
+
+    return {
+        "type": "function",
+        "function": {
+            "name": function.__name__,
+            "description": inspect.getdoc(function),
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    arg: {"type": _OPENAI_TYPE_MAP[parameter.annotation]}
+                    for arg, parameter in parameters.items()
+                    if arg not in _IGNORED_TOOL_ARGS
+                },
+                "required": [
+                    arg
+                    for arg, parameter in parameters.items()
+                    if arg not in _IGNORED_TOOL_ARGS and parameter.default is inspect.Parameter.empty
+                ],
+            },
+        },
+    }
+
+
+class OpenAIRateLimiter:
+    """
+    Holds back OpenAI requests once a rate limit is nearly used up, until that limit resets.
+
+    The limits are read from the headers on every OpenAI response:
+    https://platform.openai.com/docs/guides/rate-limits/rate-limits-in-headers
+    """
+
+    _duration_pattern = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+    _duration_unit_seconds: ClassVar[dict[str, float]] = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+    def __init__(self, min_remaining_requests: int = 1, min_remaining_tokens: int = 2000):
+        self.min_remaining = {"requests": min_remaining_requests, "tokens": min_remaining_tokens}
+        self._resume_at = 0.0
+
+    @classmethod
+    def parse_reset_duration(cls, duration: str) -> float:
+        """Parse an OpenAI reset duration (e.g. `1s`, `6m0s`, `20ms`) into seconds."""
+        return sum(
+            float(value) * cls._duration_unit_seconds[unit] for value, unit in cls._duration_pattern.findall(duration)
+        )
+
+    async def before_request(self, request: httpx.Request):
+        """Wait until the rate limits reset before sending a request, if they are nearly used up."""
+        if (delay := self._resume_at - time.monotonic()) > 0:
+            logger.warning(f"OpenAI rate limit nearly reached, waiting {delay:.2f}s before calling {request.url.path}.")
+            await asyncio.sleep(delay)
+
+    async def after_response(self, response: httpx.Response):
+        """Record when to resume sending requests, from the rate limit headers on a response."""
+        for limit, min_remaining in self.min_remaining.items():
+            remaining = response.headers.get(f"x-ratelimit-remaining-{limit}")
+            reset = response.headers.get(f"x-ratelimit-reset-{limit}")
+            if remaining is not None and reset is not None and int(remaining) < min_remaining:
+                self._resume_at = max(self._resume_at, time.monotonic() + self.parse_reset_duration(reset))
+
+
 class AssistantResponse(BaseModel):
     """Pydantic model for an assistant response."""
 
@@ -40,45 +120,62 @@ class AssistantResponse(BaseModel):
 class Assistant:
     """Class for interacting with the OpenAI API."""
 
-    def __init__(
-        self,
-        response_wait_seconds: float = 0.5,
-    ):
-        """
-        Initialize the Assistant class.
-
-        Args:
-            response_wait_seconds (float, optional): The number of seconds to wait between checking the assistant's
-                                                     response. Defaults to 0.5.
-        """
+    def __init__(self):
+        """Initialize the Assistant class."""
         from grug.ai_functions import assistant_functions
 
         if not settings.openai_key:
             raise ValueError("OpenAI API key is required to use the Assistant class.")
 
-        self.response_wait_seconds = response_wait_seconds
-        self.async_client = AsyncOpenAI(api_key=settings.openai_key.get_secret_value())
-        self.sync_client = OpenAI(api_key=settings.openai_key.get_secret_value())
+        self.rate_limiter = OpenAIRateLimiter()
+
+        # Keep idle connections open long enough to be reused between discord messages, rather than re-doing the TLS
+        # handshake whenever the bot has been quiet for more than httpx's default 5 seconds
+        self.async_client = AsyncOpenAI(
+            api_key=settings.openai_key.get_secret_value(),
+            max_retries=settings.openai_max_retries,
+            http_client=DefaultAsyncHttpxClient(
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=60.0),
+                event_hooks={
+                    "request": [self.rate_limiter.before_request],
+                    "response": [self.rate_limiter.after_response],
+                },
+            ),
+        )
         self._tools = {str(tool.__name__): tool for tool in assistant_functions}
 
-        # Create, or Update and Retrieve the assistant
-        assistants = {a.name: a.id for a in self.sync_client.beta.assistants.list().data}
-        bot_name = settings.openai_assistant_name.lower() + "-" + settings.environment.lower()
+        # The tools never change, so inspect them once instead of on every tool call
+        self._tool_parameters = {name: inspect.signature(tool).parameters for name, tool in self._tools.items()}
+        self._tool_is_coroutine = {name: inspect.iscoroutinefunction(tool) for name, tool in self._tools.items()}
+        self._assistant_tools = [get_tool_schema(tool) for tool in self._tools.values()]
+
+        # The OpenAI assistant is created or updated by `ensure_ready`, once the event loop is running
+        self.assistant: OpenAIAssistant | None = None
+        self._assistant_lock = asyncio.Lock()
+
+    async def ensure_ready(self) -> OpenAIAssistant:
+        """Create, or Update and Retrieve the OpenAI assistant, if that has not been done yet."""
+        async with self._assistant_lock:
+            if self.assistant is None:
+                assistants = {a.name: a.id async for a in self.async_client.beta.assistants.list()}
+                bot_name = settings.openai_assistant_name.lower() + "-" + settings.environment.lower()
+
+                if bot_name not in assistants:
+                    self.assistant = await self.async_client.beta.assistants.create(
+                        name=bot_name,
+                        instructions=settings.openai_assistant_instructions,
+                        model=settings.openai_model,
+                        tools=self._assistant_tools,
+                    )
+                else:
+                    self.assistant = await self.async_client.beta.assistants.update(
+                        assistant_id=assistants[bot_name],
+                        instructions=settings.openai_assistant_instructions,
+                        model=settings.openai_model,
+                        tools=self._assistant_tools,
+                    )
 
-        if bot_name not in assistants:
-            self.assistant = self.sync_client.beta.assistants.create(
-                name=bot_name,
-                instructions=settings.openai_assistant_instructions,
-                model=settings.openai_model,
-                tools=self._get_assistant_tools(),
-            )
-        else:
-            self.assistant = self.sync_client.beta.assistants.update(
-                assistant_id=assistants[bot_name],
-                instructions=settings.openai_assistant_instructions,
-                model=settings.openai_model,
-                tools=self._get_assistant_tools(),
-            )
+        return self.assistant
 
     async def respond_to_discord_message(self, message: discord.Message, discord_client: discord.Client):
         # Only respond to @mentions and DMs
@@ -92,6 +189,8 @@ class Assistant:
             logger.warning(f"Message from {message.author} in {message.channel} was not an @mention or DM, Ignoring.")
             return
 
+        openai_assistant = await self.ensure_ready()
+
         async with message.channel.typing():
             async with async_session() as db_session:
                 group: Group | None = (
@@ -109,129 +208,82 @@ class Assistant:
                     session=db_session,
                 )
 
-                # Get the OpenAI thread
-                ai_thread = (
-                    await self.async_client.beta.threads.retrieve(thread_id=discord_channel.assistant_thread_id)
-                    if discord_channel.assistant_thread_id
-                    else await self.async_client.beta.threads.create()
-                )
+                # Reuse the channel's OpenAI thread by id, only creating one for channels that do not have one yet
+                thread_id = discord_channel.assistant_thread_id or (await self.async_client.beta.threads.create()).id
 
                 # track the tools used
                 tools_used: set[str] = set()
 
-                # Send the message to the assistant
-                await self.async_client.beta.threads.messages.create(
-                    thread_id=ai_thread.id,
-                    role="user",
-                    content=(
-                        f"This message is from {user.friendly_name}.  The following is their message:\n"
-                        f"{message.content}\n\n"
-                        "[AI should not factor the person's name into its response.]\n"
-                        "[AI should not state that they received a message from the person.]"
-                    ),
-                )
-
-                # Create a new run (https://platform.openai.com/docs/assistants/how-it-works/runs-and-run-steps)
-                run = await self.async_client.beta.threads.runs.create(
-                    thread_id=ai_thread.id,
-                    assistant_id=self.assistant.id,
+                # Stream the run, so state changes arrive as they happen instead of being polled for
+                # (https://platform.openai.com/docs/assistants/how-it-works/runs-and-run-steps).  The user's message is
+                # added to the thread as part of starting the run, rather than with a request of its own.
+                run_stream = self.async_client.beta.threads.runs.stream(
+                    thread_id=thread_id,
+                    assistant_id=openai_assistant.id,
+                    additional_messages=[
+                        {
+                            "role": "user",
+                            "content": (
+                                f"This message is from {user.friendly_name}.  The following is their message:\n"
+                                f"{message.content}\n\n"
+                                "[AI should not factor the person's name into its response.]\n"
+                                "[AI should not state that they received a message from the person.]"
+                            ),
+                        }
+                    ],
                 )
 
-                # loop until the run is completed
-                while run.status != "completed":
-                    # noinspection PyUnresolvedReferences
-                    run = await self.async_client.beta.threads.runs.retrieve(thread_id=ai_thread.id, run_id=run.id)
+                # A run pauses when it needs tool outputs, and continues in a new stream once they are submitted
+                response_message = None
+                while run_stream is not None:
+                    async with run_stream as stream:
+                        run = await stream.get_final_run()
+                        response_message = stream.current_message_snapshot or response_message
+                    run_stream = None
 
                     if run.status == "failed":
                         if run.last_error.code == "rate_limit_exceeded":
                             logger.warning(f"Rate limit exceeded. Retrying with {settings.openai_fallback_model}.")
 
                             # If the rate limit is exceeded, retry with a fallback model
-                            # noinspection PyUnresolvedReferences
-                            run = await self.async_client.beta.threads.runs.create(
-                                thread_id=ai_thread.id,
-                                assistant_id=self.assistant.id,
+                            run_stream = self.async_client.beta.threads.runs.stream(
+                                thread_id=thread_id,
+                                assistant_id=openai_assistant.id,
                                 model=settings.openai_fallback_model,
                             )
 
                         else:
                             raise Exception(f"Run failed with message: {run.last_error.code}: {run.last_error.message}")
 
-                    elif run.status == "in_progress" or run.status == "queued":
-                        await asyncio.sleep(self.response_wait_seconds)
-
                     elif run.status == "requires_action":
-                        tool_outputs = []
-
-                        # execute the tool calls
-                        for tool_call in run.required_action.submit_tool_outputs.tool_calls:
-                            tools_used.add(tool_call.function.name)
-
-                            try:
-                                logger.info(f"Calling tool function: {tool_call.function.name}")
-
-                                tool_callable = self._tools[tool_call.function.name]
-                                function_args = json.loads(tool_call.function.arguments)
-                                tool_args: list[str] = inspect.getfullargspec(self._tools[tool_call.function.name]).args
-
-                                if "message" in tool_args:
-                                    function_args["message"] = message
-
-                                for arg in tool_args:
-                                    if arg not in function_args:
-                                        raise ValueError(
-                                            f"Missing argument: {arg} from function call {tool_callable.__name__}"
-                                        )
-
-                                if inspect.iscoroutinefunction(tool_callable):
-                                    # noinspection PyArgumentList
-                                    tools_response = await tool_callable(**function_args)
-                                elif inspect.isfunction(tool_callable):
-                                    # noinspection PyArgumentList
-                                    tools_response = tool_callable(**function_args)
-                                else:
-                                    raise ValueError(
-                                        f"Expected a function or coroutine function for {tool_callable.__name__}.  "
-                                        f"Got {type(tool_callable)}."
-                                    )
-
-                                tool_outputs.append(
-                                    {
-                                        "tool_call_id": tool_call.id,
-                                        "output": str(tools_response),
-                                    }
-                                )
-
-                            except Exception as e:
-                                logger.error(f"Error calling tool function: {tool_call.function.name} - {e}")
-                                tool_outputs.append(
-                                    {
-                                        "tool_call_id": tool_call.id,
-                                        "output": str(e),
-                                    }
-                                )
-
-                            # apply the tool outputs to the run
-                            run = await self.async_client.beta.threads.runs.submit_tool_outputs(
-                                thread_id=ai_thread.id,
-                                run_id=run.id,
-                                tool_outputs=tool_outputs,
-                            )
-
-                    elif run.status == "completed":
-                        continue
-
-                    else:
+                        tool_calls = run.required_action.submit_tool_outputs.tool_calls
+                        tools_used.update(tool_call.function.name for tool_call in tool_calls)
+
+                        # execute the tool calls concurrently, each tool opens its own database session
+                        tool_outputs = await asyncio.gather(
+                            *(self._call_tool_function(tool_call, message) for tool_call in tool_calls)
+                        )
+
+                        # apply the tool outputs to the run
+                        run_stream = self.async_client.beta.threads.runs.submit_tool_outputs_stream(
+                            thread_id=thread_id,
+                            run_id=run.id,
+                            tool_outputs=tool_outputs,
+                        )
+
+                    elif run.status != "completed":
                         raise ValueError(f"Unknown run status: {run.status}")
 
-                # Get the response message from the run
-                response_message = (
-                    await self.async_client.beta.threads.messages.list(
-                        thread_id=ai_thread.id,
-                        order="desc",
-                        limit=1,
-                    )
-                ).data[0]
+                # The reply normally comes from the stream, otherwise read it back from the messages of this run only
+                if response_message is None:
+                    response_message = (
+                        await self.async_client.beta.threads.messages.list(
+                            thread_id=thread_id,
+                            run_id=run.id,
+                            order="desc",
+                            limit=1,
+                        )
+                    ).data[0]
 
                 assistant_response: str = response_message.content[0].text.value
 
@@ -248,54 +300,51 @@ class Assistant:
 
             # Save the assistant thread ID to the database if it is not already saved for the current text channel
             if not discord_channel.assistant_thread_id:
-                discord_channel.assistant_thread_id = ai_thread.id
+                discord_channel.assistant_thread_id = thread_id
                 db_session.add(discord_channel)
                 await db_session.commit()
 
-    def _get_assistant_tools(self) -> list[dict]:
-        """Get the tools from the assistant_tools module."""
-        tools = []
-
-        openai_type_map = {
-            str: "string",
-            int: "integer",
-            float: "number",
-            bool: "boolean",
-        }
-
-        ignored_args = ["message"]
-
-        for function_name, function in self._tools.items():
-            function_arg_spec = inspect.getfullargspec(function)
-
-            tools.append(
-                {
-                    "type": "function",
-                    "function": {
-                        "name": function_name,
-                        "description": inspect.getdoc(function),
-                        "parameters": {
-                            "type": "object",
-                            "properties": {
-                                arg: {"type": openai_type_map[function_arg_spec.annotations[arg]]}
-                                for arg in function_arg_spec.args
-                                if arg not in ignored_args
-                            },
-                            "required": (
-                                [
-                                    arg
-                                    for arg in function_arg_spec.args[: -len(function_arg_spec.defaults)]
-                                    if arg not in ignored_args
-                                ]
-                                if function_arg_spec.defaults
-                                else []
-                            ),
-                        },
-                    },
-                }
-            )
+    async def _call_tool_function(
+        self, tool_call: RequiredActionFunctionToolCall, message: discord.Message
+    ) -> dict[str, str]:
+        """Call the tool function requested by the assistant, returning its output (or error) for the run."""
+        try:
+            logger.info(f"Calling tool function: {tool_call.function.name}")
+
+            tool_callable = self._tools[tool_call.function.name]
+            function_args = pydantic_core.from_json(tool_call.function.arguments)
+            tool_args = self._tool_parameters[tool_call.function.name]
+
+            if "message" in tool_args:
+                function_args["message"] = message
+
+            for arg in tool_args:
+                if arg not in function_args:
+                    raise ValueError(f"Missing argument: {arg} from function call {tool_callable.__name__}")
+
+            if self._tool_is_coroutine[tool_call.function.name]:
+                # noinspection PyArgumentList
+                tools_response = await tool_callable(**function_args)
+            elif inspect.isfunction(tool_callable):
+                # noinspection PyArgumentList
+                tools_response = tool_callable(**function_args)
+            else:
+                raise ValueError(
+                    f"Expected a function or coroutine function for {tool_callable.__name__}.  "
+                    f"Got {type(tool_callable)}."
+                )
 
-        return tools
+            return {
+                "tool_call_id": tool_call.id,
+                "output": str(tools_response),
+            }
+
+        except Exception as e:
+            logger.error(f"Error calling tool function: {tool_call.function.name} - {e}")
+            return {
+                "tool_call_id": tool_call.id,
+                "output": str(e),
+            }
 
 
 # Instantiate the assistant singleton for use in the application
@@ -1,4 +1,4 @@
-from datetime import date, datetime, timedelta, timezone
+from datetime import date, datetime, time, timedelta, timezone
 from typing import Any, Callable, Set
 
 import discord
@@ -6,8 +6,8 @@ from discord import Poll
 from elasticsearch import Elasticsearch
 from loguru import logger
 from openai.types import Image
-from sqlalchemy import Date, func
-from sqlmodel import cast, select
+from sqlalchemy import func
+from sqlmodel import select
 
 from grug.db import async_session
 from grug.models import DalleImageRequest
@@ -57,13 +57,15 @@ async def generate_ai_image(prompt: str) -> dict[str, str | int] | None:
 
     async with async_session() as session:
 
-        # Get the image requests remaining for the day
+        # Get the image requests remaining for the day, using a range predicate so the BRIN index can be used
+        start_of_today = datetime.combine(date.today(), time.min).astimezone()
         # noinspection PyTypeChecker,Pydantic
         picture_request_count_for_today = (
             await session.execute(
                 select(func.count("*"))
                 .select_from(DalleImageRequest)
-                .where(cast(DalleImageRequest.request_time, Date) == date.today())
+                .where(DalleImageRequest.request_time >= start_of_today)
+                .where(DalleImageRequest.request_time < start_of_today + timedelta(days=1))
             )
         ).scalar()
 
@@ -175,10 +177,10 @@ async def get_next_session_attendance(message: discord.Message) -> str:
         if not group.game_session_track_food:
             raise ValueError(f"Food tracking disabled for the group {group.name}.")
 
-        next_game_session_event = await get_or_create_next_game_session_event(group.id, db_session)
+        next_game_session_event = await get_or_create_next_game_session_event(group.id, db_session, load_rsvps=True)
 
         if next_game_session_event:
-            return next_game_session_event.user_attendance_summary_md
+            return next_game_session_event.get_user_attendance_summary_md()
         else:
             return "No upcoming game session found."
 
@@ -9,7 +9,8 @@ from grug.ai import assistant
 from grug.db import async_session
 from grug.discord_views.attendance import DiscordAttendanceCheckView
 from grug.discord_views.food import DiscordFoodBringerSelectionView
-from grug.models_crud import get_or_create_discord_server_group, get_or_create_discord_user
+from grug.models_crud import add_discord_members_to_group, get_or_create_discord_server_group, warm_statement_cache
+from grug.reminders import clear_reminder_channel_cache
 from grug.utils import InterceptLogHandler, get_interaction_response
 
 # Why the `members` intent is necessary for the Grug Discord bot:
@@ -86,14 +87,29 @@ async def on_ready():
             group = await get_or_create_discord_server_group(guild=guild, db_session=session)
 
             # Create Discord accounts for all members in the guild
-            for member in guild.members:
-                if not member.bot and member.id not in [user.discord_member_id for user in group.users]:
-                    logger.info(f"Initializing guild member {member.name} (ID: {member.id})")
-                    await get_or_create_discord_user(discord_member=member, group=group, db_session=session)
+            group_users = await group.list_users(session)
+            group_member_ids = {user.discord_member_id for user in group_users}
+            new_members = [member for member in guild.members if not member.bot and member.id not in group_member_ids]
+            if new_members:
+                logger.info(f"Initializing {len(new_members)} guild members")
+                await add_discord_members_to_group(discord_members=new_members, group=group, db_session=session)
 
     # Add persistent views to the discord bot
     discord_client.add_view(view=DiscordAttendanceCheckView())
-    discord_client.add_view(view=DiscordFoodBringerSelectionView(group))
+    discord_client.add_view(view=DiscordFoodBringerSelectionView(users=[]))
+
+    # Best-effort warm-up, a failure here should not stop the bot from serving the guilds set up above
+    if assistant:
+        try:
+            await assistant.ensure_ready()
+        except Exception as e:
+            logger.error(f"Error setting up the OpenAI assistant: {e}")
+
+    try:
+        async with async_session() as session:
+            await warm_statement_cache(session)
+    except Exception as e:
+        logger.error(f"Error warming the statement cache: {e}")
 
     logger.info(f"Logged in as {discord_client.user} (ID: {discord_client.user.id})")
 
@@ -112,3 +128,21 @@ async def on_message(message: discord.Message):
         raise ValueError("Assistant not initialized")
 
     await assistant.respond_to_discord_message(message, discord_client)
+
+
+@discord_client.event
+async def on_guild_channel_delete(channel: discord.abc.GuildChannel):
+    """Forget cached reminder channels, as one of them may have been deleted."""
+    clear_reminder_channel_cache()
+
+
+@discord_client.event
+async def on_guild_update(before: discord.Guild, after: discord.Guild):
+    """Forget cached reminder channels, as the guild's system channel may have changed."""
+    clear_reminder_channel_cache()
+
+
+@discord_client.event
+async def on_guild_remove(guild: discord.Guild):
+    """Forget cached reminder channels, as they may belong to the guild the bot left."""
+    clear_reminder_channel_cache()
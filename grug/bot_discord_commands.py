@@ -113,7 +113,6 @@ async def update_game_session_reminder(
         if days_prior:
             group.game_session_reminder_days_before_event = days_prior
         await session.commit()
-        await session.refresh(group)
 
         await get_interaction_response(interaction).send_message(
             content=(
@@ -193,17 +192,16 @@ async def update_user_info(
         session.add(db_user)
 
         if first_name:
-            db_user.first_name = first_name
+            db_user.validated_update(first_name=first_name)
         if last_name:
-            db_user.last_name = last_name
+            db_user.validated_update(last_name=last_name)
         if phone_number:
-            db_user.phone = phone_number
+            db_user.validated_update(phone=phone_number)
         if on_food_rotation is not None:
             # TODO: implement on_food_rotation
             logger.error("on_food_rotation is not implemented yet")
 
         await session.commit()
-        await session.refresh(db_user)
 
         await get_interaction_response(interaction).send_message(
             content=db_user.user_info_summary,
@@ -230,17 +228,16 @@ async def update_my_info(
         session.add(db_user)
 
         if first_name:
-            db_user.first_name = first_name
+            db_user.validated_update(first_name=first_name)
         if last_name:
-            db_user.last_name = last_name
+            db_user.validated_update(last_name=last_name)
         if phone_number:
-            db_user.phone = phone_number
+            db_user.validated_update(phone=phone_number)
         if on_food_rotation is not None:
             # TODO: implement on_food_rotation
             logger.error("on_food_rotation is not implemented yet")
 
         await session.commit()
-        await session.refresh(db_user)
 
         await get_interaction_response(interaction).send_message(
             content=db_user.user_info_summary,
@@ -18,6 +18,9 @@ async_engine = create_async_engine(
     url=settings.postgres_dsn,
     echo=False,
     future=True,
+    pool_size=settings.postgres_pool_size,
+    max_overflow=settings.postgres_max_overflow,
+    pool_recycle=settings.postgres_pool_recycle_seconds,
 )
 
 # Database session factory singleton
@@ -36,3 +39,17 @@ def init_db():
     logger.info(result.stderr)
 
     logger.info("Database initialized [alembic upgrade head].")
+
+
+async def warm_db_pool():
+    """Open the pooled database connections up front, so the first requests and reminders do not pay to connect."""
+    # Every connection is held until all are open, so each one is a new connection rather than a reused one
+    connections = [async_engine.connect() for _ in range(settings.postgres_pool_size)]
+    results = await asyncio.gather(*(connection.start() for connection in connections), return_exceptions=True)
+    await asyncio.gather(*(connection.close() for connection in connections if connection.sync_connection is not None))
+
+    errors = [result for result in results if isinstance(result, BaseException)]
+    if errors:
+        logger.warning(f"Could not open {len(errors)} of {len(connections)} pooled database connections: {errors[0]}")
+    else:
+        logger.info(f"Database connection pool warmed with {len(connections)} connections.")
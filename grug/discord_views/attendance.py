@@ -1,7 +1,6 @@
 import discord
 from loguru import logger
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlmodel import select
 
 from grug.db import async_session
 from grug.models import EventAttendanceReminderDiscordMessage, GameSessionEvent
@@ -18,22 +17,14 @@ class EventAttendanceConfirmButton(discord.ui.Button):
         )
 
     async def callback(self, interaction: discord.Interaction):
-        from grug.models_crud import get_or_create_discord_user_given_interaction
+        from grug.models_crud import get_or_create_discord_user_given_interaction, set_game_session_event_rsvp
 
         async with async_session() as session:
             user = await get_or_create_discord_user_given_interaction(interaction, session)
             event_occurrence = await _get_event_attendance_given_interaction(interaction, session)
 
             # mark the user as attending the event
-            if user not in event_occurrence.users_rsvp_yes:
-                event_occurrence.users_rsvp_yes.append(user)
-                session.add(event_occurrence)
-
-            if user in event_occurrence.users_rsvp_no:
-                event_occurrence.users_rsvp_no.remove(user)
-                session.add(event_occurrence)
-
-            await session.commit()
+            await set_game_session_event_rsvp(event_occurrence, user, attending=True, session=session)
 
         logger.info(
             f"{event_occurrence} ({event_occurrence.timestamp.date().isoformat()}): "
@@ -43,7 +34,7 @@ class EventAttendanceConfirmButton(discord.ui.Button):
         # https://discordpy.readthedocs.io/en/latest/interactions/api.html#discord.InteractionResponse.send_message
         # noinspection PyUnresolvedReferences
         await get_interaction_response(interaction).edit_message(
-            content=f"{event_occurrence.user_attendance_summary_md}\n\nWill you be attending?\n",
+            content=f"{event_occurrence.get_user_attendance_summary_md()}\n\nWill you be attending?\n",
         )
 
 
@@ -57,28 +48,20 @@ class EventAttendanceDenyButton(discord.ui.Button):
         )
 
     async def callback(self, interaction: discord.Interaction):
-        from grug.models_crud import get_or_create_discord_user_given_interaction
+        from grug.models_crud import get_or_create_discord_user_given_interaction, set_game_session_event_rsvp
 
         async with async_session() as session:
             user = await get_or_create_discord_user_given_interaction(interaction, session)
             event_occurrence = await _get_event_attendance_given_interaction(interaction, session)
 
-            if user not in event_occurrence.users_rsvp_no:
-                event_occurrence.users_rsvp_no.append(user)
-                session.add(event_occurrence)
-
-            if user in event_occurrence.users_rsvp_yes:
-                event_occurrence.users_rsvp_yes.remove(user)
-                session.add(event_occurrence)
-
-            await session.commit()
+            await set_game_session_event_rsvp(event_occurrence, user, attending=False, session=session)
 
         logger.info(
             f"{event_occurrence} ({event_occurrence.timestamp.isoformat()}): " f"{user.friendly_name} will not attend."
         )
 
         await get_interaction_response(interaction).edit_message(
-            content=f"{event_occurrence.user_attendance_summary_md}\n\nWill you be attending?\n",
+            content=f"{event_occurrence.get_user_attendance_summary_md()}\n\nWill you be attending?\n",
         )
 
 
@@ -95,17 +78,8 @@ async def _get_event_attendance_given_interaction(
     interaction: discord.Interaction, session: AsyncSession
 ) -> GameSessionEvent:
     """Get the EventAttendance for the interaction."""
-    # noinspection Pydantic
-    event_attendance_discord_message: EventAttendanceReminderDiscordMessage = (
-        (
-            await session.execute(
-                select(EventAttendanceReminderDiscordMessage).where(
-                    EventAttendanceReminderDiscordMessage.discord_message_id == interaction.message.id
-                )
-            )
-        )
-        .scalars()
-        .one_or_none()
+    event_attendance_discord_message: EventAttendanceReminderDiscordMessage | None = await session.get(
+        EventAttendanceReminderDiscordMessage, interaction.message.id
     )
 
     if event_attendance_discord_message is None:
@@ -1,17 +1,16 @@
 import discord
 from discord import SelectOption
 from loguru import logger
-from sqlmodel import select
 
 from grug.db import async_session
-from grug.models import EventFoodReminderDiscordMessage, Group
+from grug.models import EventFoodReminderDiscordMessage, User
 from grug.utils import get_food_assignment_log_text, get_interaction_response
 
 
 class EventFoodAssignedUserDropDown(discord.ui.Select):
     """A dropdown for selecting the user who is assigned to bring food."""
 
-    def __init__(self, group: Group):
+    def __init__(self, users: list[User]):
         options: list[SelectOption] = [
             discord.SelectOption(
                 label=user.friendly_name,
@@ -19,7 +18,7 @@ class EventFoodAssignedUserDropDown(discord.ui.Select):
                 value=str(user.id),
                 emoji=None,
             )
-            for user in group.users
+            for user in users
         ]
         options.append(discord.SelectOption(label="nobody", description="No food this week", value="none"))
 
@@ -35,17 +34,8 @@ class EventFoodAssignedUserDropDown(discord.ui.Select):
         selected_user_id = int(self.values[0]) if self.values[0] != "none" else None
 
         async with async_session() as session:
-            # noinspection Pydantic
-            event_food_reminder_discord_message = (
-                (
-                    await session.execute(
-                        select(EventFoodReminderDiscordMessage).where(
-                            EventFoodReminderDiscordMessage.discord_message_id == interaction.message.id
-                        )
-                    )
-                )
-                .scalars()
-                .one_or_none()
+            event_food_reminder_discord_message = await session.get(
+                EventFoodReminderDiscordMessage, interaction.message.id
             )
             if event_food_reminder_discord_message is None:
                 raise ValueError("EventFoodReminderDiscordMessage not found")
@@ -56,7 +46,6 @@ class EventFoodAssignedUserDropDown(discord.ui.Select):
             event_occurrence.user_assigned_food_id = selected_user_id
             session.add(event_occurrence)
             await session.commit()
-            await session.refresh(event_occurrence)
 
             logger.info(
                 f"User `{selected_user_id}` selected to bring food for "
@@ -72,8 +61,8 @@ class EventFoodAssignedUserDropDown(discord.ui.Select):
 class DiscordFoodBringerSelectionView(discord.ui.View):
     """A view for selecting the player who is bringing food."""
 
-    def __init__(self, group: Group):
+    def __init__(self, users: list[User]):
         super().__init__()
 
         self.timeout = None
-        self.add_item(EventFoodAssignedUserDropDown(group))
+        self.add_item(EventFoodAssignedUserDropDown(users))
@@ -1,6 +1,8 @@
 """SQLModel classes for the bot's database."""
 
+import functools
 from datetime import datetime, time, timedelta, timezone
+from typing import Any
 
 import discord
 import phonenumbers
@@ -8,38 +10,76 @@ import pytz
 import sqlalchemy as sa
 from apscheduler.triggers.cron import CronTrigger
 from pydantic import computed_field, field_validator
-from sqlalchemy import Index
+from pytz.tzinfo import BaseTzInfo
+from sqlalchemy import Connection, Index
 from sqlalchemy.dialects.postgresql import JSONB
-from sqlmodel import Field, Relationship, SQLModel
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Mapper, declared_attr, deferred
+from sqlmodel import Field, Relationship, SQLModel, select
 from sqlmodel._compat import SQLModelConfig
 
 from grug.settings import TimeZone, settings
 
 
-class SQLModelValidation(SQLModel):
+@functools.lru_cache(maxsize=128)
+def get_timezone(name: str) -> BaseTzInfo:
+    """Get the tzinfo for a timezone name, caching the result since the set of timezones in use is small."""
+    return pytz.timezone(name)
+
+
+_cron_next_fire_times: dict[str, datetime] = {}
+
+
+def get_cron_next_fire_time(cron_schedule: str) -> datetime:
     """
-    Helper class to allow for validation in SQLModel classes with table=True
+    Get the next fire time for a crontab expression.
+
+    CronTrigger objects are stateful (each call to `next()` advances them), so rather than sharing parsed triggers the
+    computed fire time is cached per expression and only recomputed once it has passed.
+
+    Args:
+        cron_schedule: The crontab expression.
+
+    Returns:
+        datetime: The next fire time for the expression.
     """
+    next_fire_time = _cron_next_fire_times.get(cron_schedule)
+    if next_fire_time is None or next_fire_time <= datetime.now(timezone.utc):
+        if len(_cron_next_fire_times) >= 1024:
+            _cron_next_fire_times.clear()
+        next_fire_time = CronTrigger.from_crontab(cron_schedule).next()
+        _cron_next_fire_times[cron_schedule] = next_fire_time
 
-    model_config = SQLModelConfig(from_attributes=True, validate_assignment=True)
+    return next_fire_time
 
 
-class UserGroupLink(SQLModelValidation, table=True):
-    __tablename__ = "users_groups_link"
-    group_id: int | None = Field(default=None, foreign_key="users.id", primary_key=True)
-    user_id: int | None = Field(default=None, foreign_key="groups.id", primary_key=True)
+class SQLModelValidation(SQLModel):
+    """
+    Helper class to allow for validation in SQLModel classes with table=True
+
+    NOTE: assignment validation is intentionally disabled, so the field validators don't run on every attribute that
+          SQLModel/SQLAlchemy sets.  Use `validated_update` on user-input paths to run the field validators explicitly.
+    """
 
+    model_config = SQLModelConfig(from_attributes=True, validate_assignment=False)
 
-class UserEventOccurrenceRsvpYesLink(SQLModelValidation, table=True):
-    __tablename__ = "user_game_session_event_rsvp_yes_link"
-    user_id: int | None = Field(default=None, foreign_key="users.id", primary_key=True)
-    event_attendance_id: int | None = Field(default=None, foreign_key="game_session_event.id", primary_key=True)
+    def validated_update(self, **values: Any) -> None:
+        """
+        Run the field validators on the given values and assign them to the model.
 
+        Args:
+            **values: The field names and values to validate and assign.
+        """
+        for name, value in values.items():
+            # Set the value through SQLAlchemy first so the change is tracked, then validate it in place
+            setattr(self, name, value)
+            self.__pydantic_validator__.validate_assignment(self, name, value)
 
-class UserEventOccurrenceRsvpNoLink(SQLModelValidation, table=True):
-    __tablename__ = "user_game_session_event_rsvp_no_link"
+
+class UserGroupLink(SQLModelValidation, table=True):
+    __tablename__ = "users_groups_link"
     user_id: int | None = Field(default=None, foreign_key="users.id", primary_key=True)
-    event_attendance_id: int | None = Field(default=None, foreign_key="game_session_event.id", primary_key=True)
+    group_id: int | None = Field(default=None, foreign_key="groups.id", primary_key=True)
 
 
 class User(SQLModelValidation, table=True):
@@ -54,7 +94,7 @@ class User(SQLModelValidation, table=True):
     __tablename__ = "users"
 
     id: int | None = Field(default=None, primary_key=True)
-    discord_member_id: int | None = Field(default=None, sa_column=sa.Column(sa.BigInteger(), index=True))
+    discord_member_id: int | None = Field(default=None, sa_column=sa.Column(sa.BigInteger(), index=True, unique=True))
 
     username: str
     first_name: str | None = None
@@ -64,19 +104,12 @@ class User(SQLModelValidation, table=True):
     groups: list["Group"] = Relationship(
         back_populates="users",
         link_model=UserGroupLink,
-        sa_relationship_kwargs={"lazy": "selectin"},
+        sa_relationship_kwargs={"lazy": "raise"},
     )
 
     # Event Tracking
     brought_food_for: list["GameSessionEvent"] = Relationship(back_populates="user_assigned_food")
-    game_session_event_rsvp_yes: list["GameSessionEvent"] = Relationship(
-        back_populates="users_rsvp_yes", link_model=UserEventOccurrenceRsvpYesLink
-    )
-    game_session_event_rsvp_no: list["GameSessionEvent"] = Relationship(
-        back_populates="users_rsvp_no", link_model=UserEventOccurrenceRsvpNoLink
-    )
 
-    @computed_field
     @property
     def friendly_name(self) -> str:
         """Get the user's friendly name."""
@@ -135,7 +168,7 @@ class Group(SQLModelValidation, table=True):
     __tablename__ = "groups"
 
     id: int | None = Field(default=None, primary_key=True)
-    discord_guild_id: int = Field(sa_column=sa.Column(sa.BigInteger(), index=True))
+    discord_guild_id: int = Field(sa_column=sa.Column(sa.BigInteger(), index=True, unique=True))
 
     name: str
     timezone: TimeZone = Field(default=settings.timezone)
@@ -149,51 +182,65 @@ class Group(SQLModelValidation, table=True):
     game_session_track_attendance: bool = True
     game_session_events: list["GameSessionEvent"] = Relationship(
         back_populates="group",
-        sa_relationship_kwargs={"lazy": "selectin", "cascade": "all, delete"},
+        sa_relationship_kwargs={"cascade": "all, delete"},
     )
 
+    # Loading every member of a group is expensive, so it must be done explicitly through `list_users`
     users: list["User"] = Relationship(
         back_populates="groups",
         link_model=UserGroupLink,
-        sa_relationship_kwargs={"lazy": "selectin"},
+        sa_relationship_kwargs={"lazy": "raise"},
     )
 
     @property
     def game_session_cron_trigger(self) -> CronTrigger | None:
+        """
+        Get a new CronTrigger for the game session schedule.
+
+        A fresh trigger is built on each access because triggers are stateful, use `get_next_game_session_event` when
+        only the next fire time is needed.
+        """
         if self.game_session_cron_schedule:
             return CronTrigger.from_crontab(self.game_session_cron_schedule)
         else:
             return None
 
-    @computed_field
-    @property
-    def next_game_session_event(self) -> datetime | None:
+    def get_next_game_session_event(self) -> datetime | None:
         """Get the next game session datetime."""
-        if self.game_session_cron_trigger:
-            return self.game_session_cron_trigger.next()
+        if self.game_session_cron_schedule:
+            return get_cron_next_fire_time(self.game_session_cron_schedule)
         else:
             return None
 
-    # noinspection PyNestedDecorators
-    @field_validator("game_session_cron_schedule")
-    @classmethod
-    def name_must_contain_space(cls, v: str | None) -> str | None:
-        if v:
-            # Validate the cron string by instantiating a CronTrigger object
-            trigger = CronTrigger.from_crontab(v)
-
-            if trigger.next() < (datetime.now() + timedelta(days=1)).astimezone(timezone.utc):
-                raise ValueError(
-                    "The next scheduled event is too soon, shceduled events must be at least 24 hours apart."
-                )
-
-        # Return the value if it is valid
-        return v
+    async def list_users(self, session: AsyncSession) -> list["User"]:
+        """Get the users that belong to this group."""
+        # noinspection PyTypeChecker,Pydantic
+        return list(
+            (await session.execute(select(User).join(UserGroupLink).where(UserGroupLink.group_id == self.id)))
+            .scalars()
+            .all()
+        )
 
     def __str__(self):
         return self.name
 
 
+@sa.event.listens_for(Group, "before_insert")
+@sa.event.listens_for(Group, "before_update")
+def validate_game_session_cron_schedule(mapper: Mapper, connection: Connection, target: Group):
+    """Validate the game session cron schedule when a group is written to the database."""
+    # Most group updates don't touch the schedule, so skip the cron parsing unless it actually changed
+    if not sa.inspect(target).attrs.game_session_cron_schedule.history.has_changes():
+        return
+
+    if target.game_session_cron_schedule:
+        # Validate the cron string by parsing it and computing the next fire time
+        next_fire_time = get_cron_next_fire_time(target.game_session_cron_schedule)
+
+        if next_fire_time < (datetime.now() + timedelta(days=1)).astimezone(timezone.utc):
+            raise ValueError("The next scheduled event is too soon, shceduled events must be at least 24 hours apart.")
+
+
 class DiscordTextChannel(SQLModelValidation, table=True):
     """SQLModel class for a Discord text channel."""
 
@@ -201,7 +248,7 @@ class DiscordTextChannel(SQLModelValidation, table=True):
 
     id: int | None = Field(default=None, primary_key=True)
 
-    discord_channel_id: int = Field(sa_column=sa.Column(sa.BigInteger(), index=True))
+    discord_channel_id: int = Field(sa_column=sa.Column(sa.BigInteger(), index=True, unique=True))
     assistant_thread_id: str | None = None
     # group_id: int | None = Field(
     #     sa_column=sa.Column(sa.BigInteger(), sa.ForeignKey("groups.id"), nullable=True, default=None),
@@ -212,7 +259,7 @@ class DiscordTextChannel(SQLModelValidation, table=True):
     # )
 
     def __str__(self):
-        return self.discord_channel_id
+        return str(self.discord_channel_id)
 
 
 class GameSessionEvent(SQLModelValidation, table=True):
@@ -228,9 +275,20 @@ class GameSessionEvent(SQLModelValidation, table=True):
         ),
     )
 
+    @declared_attr
+    def __mapper_args__(cls) -> dict[str, Any]:
+        # The food details are rarely read, so leave them out of the default SELECT.  Load them with
+        # `.options(undefer_group("food_details"))` when they are needed.
+        return {
+            "properties": {
+                name: deferred(cls.__table__.c[name], group="food_details", raiseload=True)
+                for name in ("food_name", "food_description")
+            }
+        }
+
     id: int | None = Field(default=None, primary_key=True)
     timestamp: datetime = Field(sa_column=sa.Column(sa.DateTime(timezone=True), nullable=False))
-    group_id: int = Field(foreign_key="groups.id", index=True)
+    group_id: int = Field(foreign_key="groups.id")
     group: "Group" = Relationship(
         back_populates="game_session_events",
         sa_relationship_kwargs={"lazy": "selectin"},
@@ -240,52 +298,55 @@ class GameSessionEvent(SQLModelValidation, table=True):
     food_name: str | None
     food_description: str | None
     user_assigned_food_id: int | None = Field(default=None, foreign_key="users.id")
-    user_assigned_food: User | None = Relationship(
-        back_populates="brought_food_for",
-        sa_relationship_kwargs={"lazy": "selectin"},
-    )
+    user_assigned_food: User | None = Relationship(back_populates="brought_food_for")
     food_reminder_discord_messages: list["EventFoodReminderDiscordMessage"] = Relationship(
         back_populates="game_session_event",
-        sa_relationship_kwargs={"lazy": "selectin", "cascade": "all, delete"},
+        sa_relationship_kwargs={"cascade": "all, delete", "passive_deletes": True},
     )
 
     # Attendance Tracking
-    users_rsvp_yes: list[User] = Relationship(
-        back_populates="game_session_event_rsvp_yes",
-        link_model=UserEventOccurrenceRsvpYesLink,
-        sa_relationship_kwargs={"lazy": "selectin", "cascade": "save-update, merge"},
-    )
-    users_rsvp_no: list[User] = Relationship(
-        back_populates="game_session_event_rsvp_no",
-        link_model=UserEventOccurrenceRsvpNoLink,
-        sa_relationship_kwargs={"lazy": "selectin", "cascade": "save-update, merge"},
+    # Only needed when rendering the attendance summary, so callers load it explicitly with `selectinload`
+    rsvps: list["UserGameSessionEventRsvp"] = Relationship(
+        back_populates="game_session_event",
+        sa_relationship_kwargs={"lazy": "raise_on_sql", "cascade": "all, delete-orphan", "passive_deletes": True},
     )
     attendance_reminder_discord_messages: list["EventAttendanceReminderDiscordMessage"] = Relationship(
         back_populates="game_session_event",
-        sa_relationship_kwargs={"lazy": "selectin", "cascade": "all, delete"},
+        sa_relationship_kwargs={"cascade": "all, delete", "passive_deletes": True},
     )
 
-    @computed_field
-    @property
-    def user_attendance_summary_md(self) -> str:
-        event_timestamp = self.timestamp.astimezone(pytz.timezone(self.group.timezone))
-
-        summary_md = f"## Attendance {event_timestamp.strftime('%Y-%m-%d')}\n"
-        summary_md += "**RSVP Yes**\n"
-        summary_md += "\n".join([f"- {user.friendly_name}" for user in self.users_rsvp_yes])
-        summary_md += "\n\n"
-        summary_md += "**RSVP No**\n"
-        summary_md += "\n".join([f"- {user.friendly_name}" for user in self.users_rsvp_no])
-        return summary_md
+    def get_user_attendance_summary_md(self) -> str:
+        """Build the markdown summary of who has RSVP'd to the event."""
+        event_timestamp = self.timestamp.astimezone(get_timezone(self.group.timezone))
+
+        users_rsvp_yes: list[str] = []
+        users_rsvp_no: list[str] = []
+        for rsvp in self.rsvps:
+            (users_rsvp_yes if rsvp.attending else users_rsvp_no).append(f"- {rsvp.user.friendly_name}")
+
+        return "\n".join(
+            [
+                f"## Attendance {event_timestamp.strftime('%Y-%m-%d')}",
+                "**RSVP Yes**",
+                "\n".join(users_rsvp_yes),
+                "",
+                "**RSVP No**",
+                "\n".join(users_rsvp_no),
+            ]
+        )
 
-    @computed_field
     @property
     def reminder_datetime(self) -> datetime | None:
-        if self.group.next_game_session_event:
-            return datetime.combine(
-                date=(self.timestamp - timedelta(days=self.group.game_session_reminder_days_before_event)).date(),
-                time=self.group.game_session_reminder_time,
-            ).astimezone(pytz.timezone(self.group.timezone))
+        group = self.group
+
+        # Only the presence of a schedule matters here, so avoid computing the next cron fire time
+        if group.game_session_cron_schedule:
+            # The reminder time is in the group's timezone, so build it there directly
+            group_timezone = get_timezone(group.timezone)
+            reminder_date = self.timestamp.astimezone(group_timezone).date() - timedelta(
+                days=group.game_session_reminder_days_before_event
+            )
+            return group_timezone.localize(datetime.combine(reminder_date, group.game_session_reminder_time))
 
         else:
             return None
@@ -294,6 +355,19 @@ class GameSessionEvent(SQLModelValidation, table=True):
         return f"group-{self.group_id} game session event [{self.timestamp.isoformat()}]"
 
 
+class UserGameSessionEventRsvp(SQLModelValidation, table=True):
+    """A user's RSVP to a game session event."""
+
+    __tablename__ = "user_game_session_event_rsvps"
+
+    user_id: int = Field(foreign_key="users.id", primary_key=True)
+    event_attendance_id: int = Field(foreign_key="game_session_event.id", primary_key=True, ondelete="CASCADE")
+    attending: bool
+
+    user: User = Relationship(sa_relationship_kwargs={"lazy": "joined"})
+    game_session_event: GameSessionEvent = Relationship(back_populates="rsvps")
+
+
 class EventFoodReminderDiscordMessage(SQLModelValidation, table=True):
     """Model to track discord messages for food events."""
 
@@ -303,7 +377,9 @@ class EventFoodReminderDiscordMessage(SQLModelValidation, table=True):
         default=None,
         sa_column=sa.Column(sa.BigInteger(), primary_key=True, autoincrement=True),
     )
-    game_session_event_id: int = Field(default=None, foreign_key="game_session_event.id", index=True)
+    game_session_event_id: int = Field(
+        default=None, foreign_key="game_session_event.id", ondelete="CASCADE", index=True
+    )
     game_session_event: GameSessionEvent = Relationship(
         back_populates="food_reminder_discord_messages",
         sa_relationship_kwargs={"lazy": "selectin"},
@@ -319,7 +395,9 @@ class EventAttendanceReminderDiscordMessage(SQLModelValidation, table=True):
         default=None,
         sa_column=sa.Column(sa.BigInteger(), primary_key=True, autoincrement=True),
     )
-    game_session_event_id: int = Field(default=None, foreign_key="game_session_event.id", index=True)
+    game_session_event_id: int = Field(
+        default=None, foreign_key="game_session_event.id", ondelete="CASCADE", index=True
+    )
     game_session_event: GameSessionEvent = Relationship(
         back_populates="attendance_reminder_discord_messages",
         sa_relationship_kwargs={"lazy": "selectin"},
@@ -330,10 +408,21 @@ class DalleImageRequest(SQLModelValidation, table=True):
     """Model for tracking image requests to the DALLE API."""
 
     __tablename__ = "dalle_image_requests"
+    __table_args__ = (
+        Index(
+            "brin_dalle_request_time",
+            "request_time",
+            postgresql_using="brin",
+            postgresql_with={"pages_per_range": 32},
+        ),
+    )
+    # Fetch the server generated timestamp on insert so it never needs a lazy load under asyncio
+    __mapper_args__ = {"eager_defaults": True}
 
     id: int | None = Field(default=None, primary_key=True)
-    request_time: datetime = Field(
-        default_factory=datetime.now, sa_column=sa.Column(sa.DateTime(timezone=True), nullable=False)
+    request_time: datetime | None = Field(
+        default=None,
+        sa_column=sa.Column(sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
     )
     prompt: str
     model: str
@@ -350,6 +439,15 @@ class DiscordInteractionAudit(SQLModelValidation, table=True):
     """Model for tracking discord interactions."""
 
     __tablename__ = "discord_interaction_audits"
+    __table_args__ = (
+        Index(
+            "brin_discord_interaction_audit_created_at",
+            "created_at",
+            postgresql_using="brin",
+            postgresql_with={"pages_per_range": 32},
+        ),
+    )
+    __mapper_args__ = {"eager_defaults": True}
 
     id: int | None = Field(default=None, primary_key=True)
     interaction_id: int = Field(sa_column=sa.Column(sa.BigInteger(), index=True))
@@ -357,9 +455,9 @@ class DiscordInteractionAudit(SQLModelValidation, table=True):
     channel_id: int | None = Field(default=None, sa_column=sa.Column(sa.BigInteger()))
     guild_id: int | None = Field(default=None, sa_column=sa.Column(sa.BigInteger()))
     interaction_data: dict | None = Field(default=None, sa_type=JSONB, nullable=False)
-    created_at: datetime = Field(
-        default_factory=datetime.utcnow,
-        sa_column=sa.Column(sa.DateTime(timezone=True), nullable=False),
+    created_at: datetime | None = Field(
+        default=None,
+        sa_column=sa.Column(sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
     )
 
     @classmethod
@@ -1,15 +1,126 @@
+import asyncio
 from datetime import datetime
+from typing import Any
 
 import discord
 import pytz
 from dateutil.relativedelta import relativedelta
 from loguru import logger
-from sqlalchemy import func
+from sqlalchemy import Select, bindparam
+from sqlalchemy.dialects.postgresql import Insert, insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import aliased
+from sqlalchemy.orm import joinedload, raiseload, selectinload
 from sqlmodel import select
 
-from grug.models import DiscordTextChannel, GameSessionEvent, Group, User
+from grug.db import async_session
+from grug.models import (
+    DiscordTextChannel,
+    EventAttendanceReminderDiscordMessage,
+    EventFoodReminderDiscordMessage,
+    GameSessionEvent,
+    Group,
+    User,
+    UserGameSessionEventRsvp,
+    UserGroupLink,
+)
+
+# Discord ids never change, so the primary keys they map to are remembered for the life of the process.  Known rows are
+# then read back by primary key (often straight from the session's identity map) instead of being upserted.
+_DISCORD_ID_CACHE_SIZE = 10_000
+_user_id_by_discord_member_id: dict[int, int] = {}
+_group_id_by_discord_guild_id: dict[int, int] = {}
+
+# Rows per multi-row insert, which keeps the bind parameters well under Postgres' limit of 65535 per statement
+_BULK_INSERT_CHUNK_SIZE = 1_000
+
+
+# The statements used on every discord interaction are built once and reused with bind parameters
+_insert_user = insert(User).values(discord_member_id=bindparam("discord_member_id"), username=bindparam("username"))
+_UPSERT_USER = _insert_user.on_conflict_do_update(
+    index_elements=["discord_member_id"],
+    set_={"username": _insert_user.excluded.username},
+).returning(User)
+
+# Groups and channels are read first and only inserted when missing, since they almost always exist already.  The insert
+# skips conflicts rather than rewriting the row, and a concurrent insert is picked up by reading again.
+_SELECT_GROUP = select(Group).where(Group.discord_guild_id == bindparam("discord_guild_id"))
+_INSERT_GROUP = (
+    insert(Group)
+    .values(name=bindparam("name"), discord_guild_id=bindparam("discord_guild_id"))
+    .on_conflict_do_nothing(index_elements=["discord_guild_id"])
+    .returning(Group)
+)
+
+_SELECT_CHANNEL = select(DiscordTextChannel).where(
+    DiscordTextChannel.discord_channel_id == bindparam("discord_channel_id")
+)
+_INSERT_CHANNEL = (
+    insert(DiscordTextChannel)
+    .values(discord_channel_id=bindparam("discord_channel_id"))
+    .on_conflict_do_nothing(index_elements=["discord_channel_id"])
+    .returning(DiscordTextChannel)
+)
+
+_INSERT_USER_GROUP_LINK = (
+    insert(UserGroupLink).values(user_id=bindparam("user_id"), group_id=bindparam("group_id")).on_conflict_do_nothing()
+)
+
+# Event timestamps are timezone aware, so they can be compared against UTC directly
+# noinspection Pydantic
+_SELECT_NEXT_GAME_SESSION_EVENT = (
+    select(GameSessionEvent)
+    .where(GameSessionEvent.group_id == bindparam("group_id"))
+    .where(GameSessionEvent.timestamp >= bindparam("now"))
+    .order_by(GameSessionEvent.timestamp)
+    .limit(1)
+    # The group is needed by every caller, so it is joined into this query rather than loaded by a second select
+    .options(joinedload(GameSessionEvent.group), selectinload(GameSessionEvent.user_assigned_food))
+)
+_SELECT_NEXT_GAME_SESSION_EVENT_WITH_RSVPS = _SELECT_NEXT_GAME_SESSION_EVENT.options(
+    selectinload(GameSessionEvent.rsvps)
+)
+
+
+def _cache_discord_id(cache: dict[int, int], discord_id: int, primary_key: int) -> None:
+    """Cache a discord id's primary key, clearing the whole cache first once it holds `_DISCORD_ID_CACHE_SIZE` ids."""
+    if len(cache) >= _DISCORD_ID_CACHE_SIZE:
+        cache.clear()
+    cache[discord_id] = primary_key
+
+
+async def warm_statement_cache(session: AsyncSession) -> None:
+    """
+    Run the cacheable lookups used by discord interactions once, so their SQL is compiled before the first interaction.
+
+    The lookups use ids that never exist, so nothing is loaded.  The inserts and upserts are not cached by SQLAlchemy, so
+    they are left out.
+    """
+    for model in (User, Group, EventAttendanceReminderDiscordMessage, EventFoodReminderDiscordMessage):
+        await session.get(model, -1)
+    for query in (_SELECT_NEXT_GAME_SESSION_EVENT, _SELECT_NEXT_GAME_SESSION_EVENT_WITH_RSVPS):
+        await session.execute(query, {"group_id": -1, "now": datetime.now(tz=pytz.utc)})
+    await session.execute(_SELECT_GROUP, {"discord_guild_id": -1})
+    await session.execute(_SELECT_CHANNEL, {"discord_channel_id": -1})
+
+
+async def _get_or_create_discord_user(discord_member: discord.Member, db_session: AsyncSession) -> User:
+    """Get or create the User for a discord member without committing."""
+    user: User | None = None
+    if (user_id := _user_id_by_discord_member_id.get(discord_member.id)) is not None:
+        user = await db_session.get(User, user_id)
+
+    if user is None:
+        # Create the user if they don't exist yet (keeping their username in sync with discord) in a single round-trip
+        user = (
+            await db_session.scalars(
+                _UPSERT_USER,
+                {"discord_member_id": discord_member.id, "username": discord_member.name},
+                execution_options={"populate_existing": True},
+            )
+        ).one()
+        _cache_discord_id(_user_id_by_discord_member_id, discord_member.id, user.id)
+
+    return user
 
 
 async def get_or_create_discord_user(
@@ -17,34 +128,67 @@ async def get_or_create_discord_user(
     db_session: AsyncSession,
     group: Group | None = None,
 ) -> User:
-    # noinspection Pydantic
-    user: User | None = (
-        (await db_session.execute(select(User).where(User.discord_member_id == discord_member.id)))
-        .scalars()
-        .one_or_none()
-    )
+    user = await _get_or_create_discord_user(discord_member, db_session)
 
-    if user is None:
-        # Create a user to assign to the discord account
-        user = User(
-            discord_member_id=discord_member.id,
-            username=discord_member.name,
-        )
-        if group and group not in user.groups:
-            user.groups.append(group)
+    if group:
+        # Add the group membership directly rather than loading and reconciling the user's groups collection
+        await db_session.execute(_INSERT_USER_GROUP_LINK, {"user_id": user.id, "group_id": group.id})
 
-        db_session.add(user)
-        await db_session.commit()
-        await db_session.refresh(user)
+    await db_session.commit()
 
-    elif group and group not in user.groups:
-        user.groups.append(group)
+    return user
 
-        db_session.add(user)
-        await db_session.commit()
-        await db_session.refresh(user)
 
-    return user
+async def add_discord_members_to_group(
+    discord_members: list[discord.Member],
+    group: Group,
+    db_session: AsyncSession,
+) -> list[User]:
+    """
+    Get or create the users for many discord members and add them all to a group.
+
+    The users and their group memberships are each written with multi-row statements, rather than a round-trip (and a
+    commit) per member.
+
+    Args:
+        discord_members: The discord members to add.
+        group: The group to add them to.
+        db_session: The database session.
+    """
+    # Postgres caps the number of bind parameters per statement, so very large guilds are written in chunks
+    usernames = {discord_member.id: discord_member.name for discord_member in discord_members}
+    discord_member_ids = list(usernames)
+    users: list[User] = []
+    for start in range(0, len(discord_member_ids), _BULK_INSERT_CHUNK_SIZE):
+        insert_users = insert(User).values(
+            [
+                {"discord_member_id": discord_member_id, "username": usernames[discord_member_id]}
+                for discord_member_id in discord_member_ids[start : start + _BULK_INSERT_CHUNK_SIZE]
+            ]
+        )
+        chunk_users = (
+            await db_session.scalars(
+                insert_users.on_conflict_do_update(
+                    index_elements=["discord_member_id"],
+                    set_={"username": insert_users.excluded.username},
+                ).returning(User),
+                execution_options={"populate_existing": True},
+            )
+        ).all()
+
+        await db_session.execute(
+            insert(UserGroupLink)
+            .values([{"user_id": user.id, "group_id": group.id} for user in chunk_users])
+            .on_conflict_do_nothing()
+        )
+        users.extend(chunk_users)
+
+    for user in users:
+        _cache_discord_id(_user_id_by_discord_member_id, user.discord_member_id, user.id)
+
+    await db_session.commit()
+
+    return users
 
 
 async def get_or_create_discord_user_given_interaction(
@@ -53,30 +197,65 @@ async def get_or_create_discord_user_given_interaction(
 ) -> User:
     """Get a User for the given discord interaction."""
 
-    return await get_or_create_discord_user(
-        discord_member=interaction.user,
-        group=await get_or_create_discord_server_group(interaction.guild, db_session) if interaction.guild else None,
-        db_session=db_session,
+    if interaction.guild is None:
+        return await get_or_create_discord_user(discord_member=interaction.user, db_session=db_session)
+
+    async def get_group_id() -> int:
+        """Resolve the group on its own short-lived session, so it runs alongside the user lookup on `db_session`."""
+        async with async_session() as group_session:
+            return (await get_or_create_discord_server_group(interaction.guild, group_session)).id
+
+    user, group_id = await asyncio.gather(
+        _get_or_create_discord_user(interaction.user, db_session),
+        get_group_id(),
     )
 
+    await db_session.execute(_INSERT_USER_GROUP_LINK, {"user_id": user.id, "group_id": group_id})
+    await db_session.commit()
+
+    return user
+
+
+async def _select_or_insert(
+    session: AsyncSession,
+    select_statement: Select,
+    insert_statement: Insert,
+    select_params: dict[str, Any],
+    insert_params: dict[str, Any],
+) -> Any:
+    """
+    Read a row, inserting it when it does not exist yet.
+
+    Only an insert is committed, so looking up an existing row writes nothing.  If another session inserts the row
+    first, the insert returns nothing and the row is read again.
+    """
+    row = await session.scalar(select_statement, select_params)
+    if row is None:
+        row = await session.scalar(insert_statement, insert_params, execution_options={"populate_existing": True})
+        if row is None:
+            row = await session.scalar(select_statement, select_params)
+        await session.commit()
+
+    return row
+
 
 async def get_or_create_discord_server_group(
     guild: discord.Guild,
     db_session: AsyncSession,
 ) -> Group:
-    # noinspection Pydantic
-    discord_server_group: Group | None = (
-        (await db_session.execute(select(Group).where(Group.discord_guild_id == guild.id))).scalars().one_or_none()
+    if (group_id := _group_id_by_discord_guild_id.get(guild.id)) is not None:
+        discord_server_group: Group | None = await db_session.get(Group, group_id)
+        if discord_server_group is not None:
+            return discord_server_group
+
+    discord_server_group = await _select_or_insert(
+        db_session,
+        _SELECT_GROUP,
+        _INSERT_GROUP,
+        {"discord_guild_id": guild.id},
+        {"name": guild.name, "discord_guild_id": guild.id},
     )
-
-    if discord_server_group is None:
-        discord_server_group = Group(
-            name=guild.name,
-            discord_guild_id=guild.id,
-        )
-        db_session.add(discord_server_group)
-        await db_session.commit()
-        await db_session.refresh(discord_server_group)
+    _cache_discord_id(_group_id_by_discord_guild_id, guild.id, discord_server_group.id)
 
     return discord_server_group
 
@@ -85,63 +264,84 @@ async def get_or_create_discord_text_channel(
     channel: discord.TextChannel,
     session: AsyncSession,
 ) -> DiscordTextChannel:
-    # noinspection Pydantic
-    discord_channel: DiscordTextChannel | None = (
-        (await session.execute(select(DiscordTextChannel).where(DiscordTextChannel.discord_channel_id == channel.id)))
-        .scalars()
-        .one_or_none()
-    )
-
-    if discord_channel is None:
-        discord_channel = DiscordTextChannel(
-            discord_channel_id=channel.id,
-            group_id=(await get_or_create_discord_server_group(channel.guild, session)).id if channel.guild else None,
-        )
-        session.add(discord_channel)
-        await session.commit()
-        await session.refresh(discord_channel)
+    params = {"discord_channel_id": channel.id}
+    return await _select_or_insert(session, _SELECT_CHANNEL, _INSERT_CHANNEL, params, params)
 
-    return discord_channel
 
-
-async def get_or_create_next_game_session_event(group_id: int, session: AsyncSession) -> GameSessionEvent | None:
+async def get_or_create_next_game_session_event(
+    group_id: int, session: AsyncSession, load_rsvps: bool = False
+) -> GameSessionEvent | None:
     logger.info(f"Creating next event if it does not exist for Event_ID: {group_id}")
 
-    # noinspection Pydantic
-    group: Group = (await session.execute(select(Group).where(Group.id == group_id))).scalars().one_or_none()
+    # Most of the time the next event already exists, so look for it first and only load the group when an event needs
+    # to be created.
+    query = _SELECT_NEXT_GAME_SESSION_EVENT_WITH_RSVPS if load_rsvps else _SELECT_NEXT_GAME_SESSION_EVENT
+    event_occurrence: GameSessionEvent | None = await session.scalar(
+        query, {"group_id": group_id, "now": datetime.now(tz=pytz.utc)}
+    )
+    if event_occurrence is not None:
+        return event_occurrence
+
+    group: Group | None = await session.get(Group, group_id, options=[raiseload("*")])
     if group is None:
         raise ValueError(f"Event {group_id} not found.")
 
-    # Search through the event occurrences and see if any exist after current datetime, if more than one, return just
-    # the next one
-    # noinspection Pydantic
-    query = (
-        select(GameSessionEvent)
-        .where(GameSessionEvent.group_id == group_id)
-        .where(GameSessionEvent.timestamp >= datetime.now(pytz.timezone(group.timezone)))
-        .order_by(GameSessionEvent.timestamp)
+    # If none exist, create a new event occurrence for the next event
+    next_game_session_event = group.get_next_game_session_event()
+    if not next_game_session_event:
+        logger.info(f"No future event occurrences found for Event_ID: {group_id}, and no next event datetime set.")
+        return None
+
+    logger.info(f"No future event occurrences found for Event_ID: {group_id}, creating one now.")
+    # Populate the relationships up front so the new event can be used after the commit without reloading it
+    event_occurrence = GameSessionEvent(
+        group=group,
+        timestamp=next_game_session_event,
+        rsvps=[],
+        user_assigned_food=None,
     )
-    future_event_occurrences: list[GameSessionEvent] = list((await session.execute(query)).scalars().all())
+    session.add(event_occurrence)
+    await session.commit()
 
-    # If none exist, create a new event occurrence for the next event
-    if len(future_event_occurrences) == 0:
-        if not group.next_game_session_event:
-            logger.info(f"No future event occurrences found for Event_ID: {group_id}, and no next event datetime set.")
-            return None
-
-        logger.info(f"No future event occurrences found for Event_ID: {group_id}, creating one now.")
-        event_occurrence = GameSessionEvent(
-            group_id=group_id,
-            timestamp=group.next_game_session_event,
-        )
-        session.add(event_occurrence)
-        await session.commit()
-        await session.refresh(event_occurrence)
+    return event_occurrence
 
-    else:
-        event_occurrence = future_event_occurrences[0]
 
-    return event_occurrence
+async def get_or_create_next_game_session_events(
+    group_ids: list[int], session: AsyncSession
+) -> dict[int, GameSessionEvent | None]:
+    """
+    Get or create the next game session event of each group, keyed by group id.
+
+    The existing events of every group are read in one DISTINCT ON query, and only the groups without an upcoming event
+    fall back to `get_or_create_next_game_session_event` to have one created.
+
+    Args:
+        group_ids: The IDs of the groups.
+        session: The database session.
+    """
+    if not group_ids:
+        return {}
+
+    # noinspection Pydantic
+    next_events: dict[int, GameSessionEvent | None] = {
+        event.group_id: event
+        for event in (
+            await session.execute(
+                select(GameSessionEvent)
+                .where(GameSessionEvent.group_id.in_(group_ids))
+                .where(GameSessionEvent.timestamp >= datetime.now(tz=pytz.utc))
+                .distinct(GameSessionEvent.group_id)
+                .order_by(GameSessionEvent.group_id, GameSessionEvent.timestamp)
+                .options(joinedload(GameSessionEvent.group), selectinload(GameSessionEvent.user_assigned_food))
+            )
+        ).scalars()
+    }
+
+    for group_id in group_ids:
+        if group_id not in next_events:
+            next_events[group_id] = await get_or_create_next_game_session_event(group_id, session)
+
+    return next_events
 
 
 async def get_distinct_users_who_last_brought_food(
@@ -158,30 +358,43 @@ async def get_distinct_users_who_last_brought_food(
         months_back: The number of months back to search for food history.
     """
 
-    # Subquery to get the latest timestamp for each group
+    # Latest event each user brought food to, picked in the database with DISTINCT ON
     # noinspection Pydantic
-    subquery = (
-        select(GameSessionEvent.user_assigned_food_id, func.max(GameSessionEvent.timestamp).label("latest_timestamp"))
-        .group_by(GameSessionEvent.user_assigned_food_id)
+    latest_food_events = (
+        select(GameSessionEvent.user_assigned_food_id, GameSessionEvent.timestamp)
+        .where(GameSessionEvent.group_id == group_id)
+        .where(GameSessionEvent.user_assigned_food_id.is_not(None))
+        .where(GameSessionEvent.timestamp >= datetime.now(tz=pytz.utc) - relativedelta(months=months_back))
+        .distinct(GameSessionEvent.user_assigned_food_id)
+        .order_by(GameSessionEvent.user_assigned_food_id, GameSessionEvent.timestamp.desc())
         .subquery()
     )
 
-    # Alias for the main table
-    main_table = aliased(GameSessionEvent)
-
-    # Join the main table with the subquery to get the latest records
+    # noinspection Pydantic
     query = (
-        select(main_table)
-        .join(
-            subquery,
-            (main_table.user_assigned_food_id == subquery.c.user_assigned_food_id)
-            & (main_table.timestamp == subquery.c.latest_timestamp),
-        )
-        .where(main_table.group_id == group_id)
-        .where(main_table.timestamp >= datetime.now(tz=pytz.utc) - relativedelta(months=months_back))
-        .order_by(main_table.timestamp.desc())
+        select(User, latest_food_events.c.timestamp)
+        .join(latest_food_events, User.id == latest_food_events.c.user_assigned_food_id)
+        .order_by(latest_food_events.c.timestamp.desc())
     )
 
-    results = (await db_session.execute(query)).scalars().all()
+    return [(user, timestamp) for user, timestamp in (await db_session.execute(query)).all()]
 
-    return [(obj.user_assigned_food, obj.timestamp) for obj in results]
+
+async def set_game_session_event_rsvp(
+    game_session_event: GameSessionEvent,
+    user: User,
+    attending: bool,
+    session: AsyncSession,
+) -> None:
+    """Record whether a user will attend a game session event, replacing any earlier RSVP."""
+    # noinspection PyTypeChecker
+    await session.execute(
+        insert(UserGameSessionEventRsvp)
+        .values(user_id=user.id, event_attendance_id=game_session_event.id, attending=attending)
+        .on_conflict_do_update(
+            index_elements=["user_id", "event_attendance_id"],
+            set_={"attending": attending},
+        )
+    )
+    await session.commit()
+    await session.refresh(game_session_event, ["rsvps"])
@@ -1,20 +1,80 @@
-from anyio.from_thread import start_blocking_portal
+import asyncio
+from itertools import chain
+
 from loguru import logger
-from sqlalchemy import Connection, event
-from sqlalchemy.orm import Mapper
+from sqlalchemy import event
+from sqlalchemy.orm import Session, SessionTransaction, UOWTransaction
 
 from grug import models
 from grug.scheduler import update_group_schedules
 
+# Strong references to the running schedule updates, so they are not garbage collected before they finish
+_background_tasks: set[asyncio.Task] = set()
+
+# Commits that touch the same group in quick succession (bulk edits, admin changes) only trigger one schedule update
+_SCHEDULE_UPDATE_DEBOUNCE_SECONDS = 0.1
+_pending_schedule_updates: dict[int, asyncio.TimerHandle] = {}
+
+# Bulk changes can dirty many groups at once, so only a few schedule updates run (and hold a connection) at a time
+_MAX_CONCURRENT_SCHEDULE_UPDATES = 8
+_schedule_update_slots = asyncio.Semaphore(_MAX_CONCURRENT_SCHEDULE_UPDATES)
+
+_DIRTY_GROUP_IDS_KEY = "grug_dirty_group_ids"
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_dirty_group_ids(session: Session, flush_context: UOWTransaction):
+    """Remember which groups had a group or game session event inserted or updated in this transaction."""
+    dirty_group_ids: set[int] = session.info.setdefault(_DIRTY_GROUP_IDS_KEY, set())
+    for instance in chain(session.new, (instance for instance in session.dirty if session.is_modified(instance))):
+        if isinstance(instance, models.Group) and instance.id is not None:
+            dirty_group_ids.add(instance.id)
+        elif isinstance(instance, models.GameSessionEvent) and instance.group_id is not None:
+            dirty_group_ids.add(instance.group_id)
+
+
+async def _run_group_schedule_update(group_id: int):
+    """Update the schedules of a group once one of the concurrent update slots is free."""
+    async with _schedule_update_slots:
+        await update_group_schedules(group_id=group_id)
+
+
+def _start_group_schedule_update(group_id: int):
+    """Start the schedule update of a group once its debounce timer has run out."""
+    _pending_schedule_updates.pop(group_id, None)
+    task = asyncio.get_running_loop().create_task(_run_group_schedule_update(group_id))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+@event.listens_for(Session, "after_commit")
+def _update_group_schedules(session: Session):
+    """Update the group schedules once per group, after the groups and game session events are committed."""
+    dirty_group_ids: set[int] = session.info.pop(_DIRTY_GROUP_IDS_KEY, set())
+    if not dirty_group_ids:
+        return
+
+    # Async sessions commit on the application's event loop, so the update is scheduled there.  Sync sessions (scripts,
+    # migrations, tests) have no loop to schedule on, so their changes are picked up by the next schedule update.
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        logger.warning(f"No running event loop, skipping the schedule updates for groups: {sorted(dirty_group_ids)}")
+        return
+
+    for group_id in dirty_group_ids:
+        # loguru only formats the message if a handler accepts debug logs
+        logger.debug("sqlalchemy commit for group `{}` triggering `update_group_schedules`", group_id)
 
-def _update_group_schedules(mapper: Mapper, connection: Connection, target: models.Group):
-    """Update the group schedules when a group or game session event is updated."""
-    logger.info(f"sqlalchemy upsert event for model `{target}` triggering `update_group_schedules`")
-    with start_blocking_portal() as portal:
-        portal.start_task_soon(update_group_schedules, None, target)
+        # Restart the group's debounce timer, so only the last of several quick commits updates the schedules
+        if pending_update := _pending_schedule_updates.pop(group_id, None):
+            pending_update.cancel()
+        _pending_schedule_updates[group_id] = loop.call_later(
+            _SCHEDULE_UPDATE_DEBOUNCE_SECONDS, _start_group_schedule_update, group_id
+        )
 
 
-event.listen(models.Group, "after_insert", _update_group_schedules)
-event.listen(models.Group, "after_update", _update_group_schedules)
-event.listen(models.GameSessionEvent, "after_insert", _update_group_schedules)
-event.listen(models.GameSessionEvent, "after_update", _update_group_schedules)
+@event.listens_for(Session, "after_soft_rollback")
+def _clear_dirty_group_ids(session: Session, previous_transaction: SessionTransaction):
+    """Forget the dirty group ids of a rolled back transaction."""
+    session.info.pop(_DIRTY_GROUP_IDS_KEY, None)
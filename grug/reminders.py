@@ -1,56 +1,64 @@
+import asyncio
+
+import discord
 from loguru import logger
+from sqlalchemy import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from grug.db import async_session
 from grug.discord_views.attendance import DiscordAttendanceCheckView
 from grug.discord_views.food import DiscordFoodBringerSelectionView
-from grug.models import EventAttendanceReminderDiscordMessage, EventFoodReminderDiscordMessage
+from grug.models import EventAttendanceReminderDiscordMessage, EventFoodReminderDiscordMessage, GameSessionEvent, Group
 from grug.models_crud import get_or_create_next_game_session_event
 from grug.utils import get_food_assignment_log_text
 
+# discord.py resolves a channel id by searching every guild the bot is in, so the channels reminders go to are kept,
+# keyed by guild and bot channel ids, until a channel is deleted or a guild changes (see `bot_discord`)
+_reminder_channels: dict[tuple[int, int | None], discord.abc.Messageable] = {}
+
+
+def clear_reminder_channel_cache():
+    """Forget the resolved reminder channels, so they are looked up again on the next reminder."""
+    _reminder_channels.clear()
+
 
-async def send_attendance_reminder(group_id: int, session: AsyncSession):
+def _get_group_discord_channel(group: Group) -> discord.abc.Messageable:
+    """Get the channel reminders are sent to, the group's bot channel or else the guild's system channel."""
+    key = (group.discord_guild_id, group.discord_bot_channel_id)
+    if (channel := _reminder_channels.get(key)) is not None:
+        return channel
+
+    # Imported here as `bot_discord` imports this module, this only runs when a channel is not cached yet
     from grug.bot_discord import discord_client
 
-    game_session_event = await get_or_create_next_game_session_event(group_id=group_id, session=session)
+    if group.discord_bot_channel_id is not None:
+        channel = discord_client.get_channel(group.discord_bot_channel_id)
+    else:
+        channel = discord_client.get_guild(group.discord_guild_id).system_channel
 
-    if not game_session_event:
-        logger.info("Group ID has no future events, no attendance reminder to send.")
-        return
+    if channel is not None:
+        _reminder_channels[key] = channel
+    return channel
 
+
+async def send_attendance_reminder(game_session_event: GameSessionEvent) -> discord.Message:
+    """Send the attendance reminder for a game session event, with its RSVPs loaded."""
     logger.info(f"Sending attendance reminder for GameSessionEvent ID: {game_session_event.id}")
 
-    # Get the default discord channel
-    if game_session_event.group.discord_bot_channel_id is not None:
-        guild_channel = discord_client.get_channel(game_session_event.group.discord_bot_channel_id)
-    else:
-        guild_id = game_session_event.group.discord_guild_id
-        guild_channel = discord_client.get_guild(guild_id).system_channel
+    guild_channel = _get_group_discord_channel(game_session_event.group)
 
     # Send the message to discord
     message = await guild_channel.send(
-        content=f"{game_session_event.user_attendance_summary_md}\n\nWill you be attending?\n\n",
+        content=f"{game_session_event.get_user_attendance_summary_md()}\n\nWill you be attending?\n\n",
         view=DiscordAttendanceCheckView(),
     )
 
-    session.add(
-        EventAttendanceReminderDiscordMessage(
-            discord_message_id=message.id,
-            game_session_event_id=game_session_event.id,
-        )
-    )
-    await session.commit()
-
-
-async def send_food_reminder(group_id: int, session: AsyncSession):
-    from grug.bot_discord import discord_client
+    return message
 
-    # Get the next event
-    game_session_event = await get_or_create_next_game_session_event(group_id=group_id, session=session)
 
+async def send_food_reminder(game_session_event: GameSessionEvent, session: AsyncSession) -> discord.Message:
+    """Send the food reminder for a game session event."""
     # Validate the event
-    if not game_session_event:
-        logger.info("Group ID has no future events, no food reminder to send.")
-        return
     if game_session_event.group_id is None:
         raise ValueError("Event occurrence ID is required to send a food reminder.")
 
@@ -59,7 +67,8 @@ async def send_food_reminder(group_id: int, session: AsyncSession):
 
     # Build the food reminder message
     message_content = "## Food\n"
-    message_content += await get_food_assignment_log_text(group_id, session)
+    message_content += await get_food_assignment_log_text(game_session_event.group_id, session)
+    group_users = await game_session_event.group.list_users(session)
 
     # Expand the messge for select box instructions
     if game_session_event.user_assigned_food is not None:
@@ -67,43 +76,58 @@ async def send_food_reminder(group_id: int, session: AsyncSession):
     else:
         message_content += f"\n\nGrug want know, who bring food on {game_session_event.timestamp.date().isoformat()}?"
 
-    # Get the default discord channel
-    if game_session_event.group.discord_bot_channel_id is not None:
-        guild_channel = discord_client.get_channel(game_session_event.group.discord_bot_channel_id)
-    else:
-        guild_id = game_session_event.group.discord_guild_id
-        guild_channel = discord_client.get_guild(guild_id).system_channel
+    guild_channel = _get_group_discord_channel(game_session_event.group)
 
     # Send the message to discord
     message = await guild_channel.send(
         content=message_content,
-        view=DiscordFoodBringerSelectionView(group=game_session_event.group),
+        view=DiscordFoodBringerSelectionView(users=group_users),
     )
 
-    # Update the food_event with the message_id
-    session.add(
-        EventFoodReminderDiscordMessage(
-            discord_message_id=message.id,
-            game_session_event_id=game_session_event.id,
-        )
-    )
-    await session.commit()
+    return message
 
 
 async def game_session_reminder(group_id: int, session: AsyncSession | None = None):
     # TODO: when subsequent reminders are sent, remove all previous reminders for the same event.
 
     if session is None:
-        from grug.db import async_session
-
         async with async_session() as session:
-            # TODO: have a button to make the session as canceld (toggle button that can be toggled back on if needed)
-            #       - when a session is canceled, all reminders for that session should be removed
-            #       - if the canceled session is uncanceled, the reminders should be re-added
-            #       - if canceled, set whoever is assigned to food to null
-            await send_attendance_reminder(group_id, session)
-            await send_food_reminder(group_id, session)
+            await game_session_reminder(group_id, session)
+        return
 
-    else:
-        await send_attendance_reminder(group_id, session)
-        await send_food_reminder(group_id, session)
+    # Both reminders are for the next event, so it is only looked up once
+    game_session_event = await get_or_create_next_game_session_event(
+        group_id=group_id, session=session, load_rsvps=True
+    )
+    if not game_session_event:
+        logger.info("Group ID has no future events, no reminders to send.")
+        return
+
+    # TODO: have a button to make the session as canceld (toggle button that can be toggled back on if needed)
+    #       - when a session is canceled, all reminders for that session should be removed
+    #       - if the canceled session is uncanceled, the reminders should be re-added
+    #       - if canceled, set whoever is assigned to food to null
+    # The reminders are sent concurrently, and only the food reminder reads from the session while they run
+    results = await asyncio.gather(
+        send_attendance_reminder(game_session_event),
+        send_food_reminder(game_session_event, session),
+        return_exceptions=True,
+    )
+
+    # Record the sent messages together once both are done, so a message that was sent is recorded even if the other
+    # reminder failed.  The rows are never read back here, so they are inserted directly rather than through the ORM.
+    for reminder_message_model, result in zip(
+        (EventAttendanceReminderDiscordMessage, EventFoodReminderDiscordMessage), results
+    ):
+        if not isinstance(result, BaseException):
+            await session.execute(
+                insert(reminder_message_model).values(
+                    discord_message_id=result.id,
+                    game_session_event_id=game_session_event.id,
+                )
+            )
+    await session.commit()
+
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
@@ -1,9 +1,8 @@
 """Scheduler for the Grug bot."""
 
 import asyncio
-from datetime import timezone
 
-from apscheduler import AsyncScheduler, ConflictPolicy, Schedule, ScheduleLookupError
+from apscheduler import AsyncScheduler, ConflictPolicy, Schedule
 from apscheduler.datastores.sqlalchemy import SQLAlchemyDataStore
 from apscheduler.eventbrokers.asyncpg import AsyncpgEventBroker
 from apscheduler.triggers.cron import CronTrigger
@@ -11,12 +10,12 @@ from apscheduler.triggers.date import DateTrigger
 from loguru import logger
 from pydantic import PostgresDsn
 from sqlalchemy import text
-from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import raiseload
 from sqlmodel import select
 
 from grug.db import async_engine, async_session
-from grug.models import Group
-from grug.models_crud import get_or_create_next_game_session_event
+from grug.models import Group, get_cron_next_fire_time
+from grug.models_crud import get_or_create_next_game_session_events
 from grug.reminders import game_session_reminder
 from grug.settings import settings
 
@@ -26,20 +25,17 @@ scheduler = AsyncScheduler(
         engine_or_url=async_engine,
         schema="apscheduler",
     ),
-    event_broker=AsyncpgEventBroker.from_async_sqla_engine(
-        engine=create_async_engine(
-            url=str(
-                PostgresDsn.build(
-                    scheme="postgresql+asyncpg",
-                    host=settings.postgres_host,
-                    port=settings.postgres_port,
-                    username=settings.postgres_user,
-                    password=settings.postgres_password.get_secret_value(),
-                    path=settings.postgres_db,
-                )
-            ),
-            echo=False,
-            future=True,
+    # The event broker holds a single asyncpg LISTEN connection, so it is given a DSN rather than a second engine
+    event_broker=AsyncpgEventBroker.from_dsn(
+        dsn=str(
+            PostgresDsn.build(
+                scheme="postgresql",
+                host=settings.postgres_host,
+                port=settings.postgres_port,
+                username=settings.postgres_user,
+                password=settings.postgres_password.get_secret_value(),
+                path=settings.postgres_db,
+            )
         ),
     ),
 )
@@ -53,13 +49,9 @@ async def start_scheduler(discord_bot_startup_timeout: int = 15):
         await conn.execute(text("CREATE SCHEMA IF NOT EXISTS apscheduler"))
 
     # wait for the discord bot to be ready
-    timed_out = True
-    for _ in range(discord_bot_startup_timeout):
-        if discord_client.is_ready():
-            timed_out = False
-            break
-        await asyncio.sleep(1)
-    if timed_out:
+    try:
+        await asyncio.wait_for(discord_client.wait_until_ready(), timeout=discord_bot_startup_timeout)
+    except asyncio.TimeoutError:
         raise TimeoutError(
             f"Timeout reached in {discord_bot_startup_timeout} seconds. Discord bot did not achieve ready state in "
             "the allowed time."
@@ -70,6 +62,11 @@ async def start_scheduler(discord_bot_startup_timeout: int = 15):
         await scheduler.run_until_stopped()
 
 
+def _get_group_schedule_ids(group_id: int) -> tuple[str, str]:
+    """Get the ids of a group's game session schedule and game session reminder schedule."""
+    return f"group_{group_id}_game_session_schedule", f"group_{group_id}_game_session_reminder_schedule"
+
+
 async def update_group_schedules(group_id: int | None = None, group: Group | None = None):
     """
     Update the game session schedules for a group or all groups.
@@ -82,51 +79,61 @@ async def update_group_schedules(group_id: int | None = None, group: Group | Non
 
     # Lookup the group(s) to update game session schedules for
     async with async_session() as session:
+        # None of the group relationships are needed here, so they are set to raise rather than quietly lazy loading
+        # once per group
         if group_id:
-            # noinspection Pydantic
-            groups = list((await session.execute(select(Group).where(Group.id == group_id))).scalars().all())
+            db_group = await session.get(Group, group_id, options=[raiseload("*")])
+            groups = [db_group] if db_group else []
         elif group:
             groups = [group]
         else:
-            groups = (await session.execute(select(Group))).scalars().all()
+            groups = (await session.execute(select(Group).options(raiseload("*")))).scalars().all()
 
-        # Update the game session schedules for each group
         for group in groups:
             if not group or not group.id:
                 raise ValueError("Group not found.")
 
-            game_session_schedule_id = f"group_{group.id}_game_session_schedule"
-            game_session_reminder_schedule_id = f"group_{group.id}_game_session_reminder_schedule"
+        # Load the existing schedules of every group in a single data store query (the data store returns every
+        # schedule when given no ids, so the query is skipped when there are no groups).  The ids are built once per
+        # group and reused in the loop below.
+        group_schedule_ids = {group.id: _get_group_schedule_ids(group.id) for group in groups}
+        schedule_ids = {schedule_id for ids in group_schedule_ids.values() for schedule_id in ids}
+        schedules: dict[str, Schedule] = (
+            {schedule.id: schedule for schedule in await scheduler.data_store.get_schedules(schedule_ids)}
+            if schedule_ids
+            else {}
+        )
+
+        # Get (or create) the next game session event of every group up front, rather than querying once per group
+        next_game_session_events = await get_or_create_next_game_session_events([group.id for group in groups], session)
+
+        # Update the game session schedules for each group
+        for group in groups:
+            game_session_schedule_id, game_session_reminder_schedule_id = group_schedule_ids[group.id]
 
             # Get the game session schedule
             replace_session_schedule = False
-            try:
-                game_session_schedule: Schedule | None = await scheduler.get_schedule(game_session_schedule_id)
-
-                if game_session_schedule:
-                    # Check if the trigger is a cron trigger
-                    if isinstance(game_session_schedule.trigger, CronTrigger):
-                        # Check if the group schedule has changed
-                        t1 = game_session_schedule.next_fire_time.astimezone(timezone.utc)
-                        t2 = (
-                            group.game_session_cron_trigger.next().astimezone(timezone.utc)
-                            if group.game_session_cron_trigger
-                            else None
-                        )
-                        if t1 != t2:
-                            replace_session_schedule = True
-
-                    # If the trigger is not a cron trigger, replace the schedule
-                    else:
-                        await scheduler.remove_schedule(game_session_schedule_id)
+            game_session_schedule: Schedule | None = schedules.get(game_session_schedule_id)
+            if game_session_schedule:
+                # Check if the trigger is a cron trigger
+                if isinstance(game_session_schedule.trigger, CronTrigger):
+                    # Check if the group schedule has changed (both are timezone aware, so they compare as instants
+                    # without converting either to UTC first)
+                    next_fire_time = (
+                        get_cron_next_fire_time(group.game_session_cron_schedule)
+                        if group.game_session_cron_schedule
+                        else None
+                    )
+                    if game_session_schedule.next_fire_time != next_fire_time:
                         replace_session_schedule = True
 
+                # If the trigger is not a cron trigger, replace the schedule
                 else:
+                    await scheduler.remove_schedule(game_session_schedule_id)
                     replace_session_schedule = True
 
             # If the schedule does not exist, mark it for replacement
-            except ScheduleLookupError:
-                game_session_schedule = None
+            else:
                 replace_session_schedule = True
 
             # Update the game session schedule if needed
@@ -149,15 +156,10 @@ async def update_group_schedules(group_id: int | None = None, group: Group | Non
                     logger.info(f"Updated group game session schedule for group: {group.id}")
 
             # Update the game session reminder schedule
-            try:
-                game_session_reminder_schedule: Schedule | None = await scheduler.get_schedule(
-                    game_session_reminder_schedule_id
-                )
-            except ScheduleLookupError:
-                game_session_reminder_schedule = None
+            game_session_reminder_schedule: Schedule | None = schedules.get(game_session_reminder_schedule_id)
 
             # Get the next game session event
-            next_game_session_event = await get_or_create_next_game_session_event(group.id, session)
+            next_game_session_event = next_game_session_events[group.id]
 
             # Update the game session reminder schedule if needed, based on the next game session event, not
             # necessarily the group defined schedule
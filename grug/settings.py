@@ -1,15 +1,25 @@
-from enum import StrEnum
+from functools import cached_property
 from pathlib import Path
-from typing import Literal, Self
+from typing import Annotated, ClassVar, Literal, Self
 
 import pytz
-from pydantic import AliasChoices, Field, PostgresDsn, SecretStr, computed_field, model_validator
+from pydantic import AfterValidator, AliasChoices, Field, PostgresDsn, SecretStr, computed_field, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
-TimeZone = StrEnum("TimeZone", tuple((tz, tz) for tz in pytz.common_timezones))
 _ROOT_DIR = Path(__file__).parent.parent.absolute()
 
 
+def _validate_timezone(value: str) -> str:
+    """Check that a timezone name is known to pytz."""
+    if value not in pytz.all_timezones_set:
+        raise ValueError(f"unknown timezone: {value}")
+    return value
+
+
+# Timezone names are validated against pytz's frozenset of names, rather than building an enum of every timezone
+TimeZone = Annotated[str, AfterValidator(_validate_timezone)]
+
+
 class Settings(BaseSettings):
     """Settings for the Grug Bot."""
 
@@ -24,9 +34,12 @@ class Settings(BaseSettings):
         env_nested_delimiter="__",
     )
 
+    # The root directory of the project, which is constant so it is not a settings field
+    root_dir: ClassVar[Path] = _ROOT_DIR
+
     # General Settings
     environment: Literal["dev", "prd"] = "dev"
-    timezone: TimeZone = Field(default=TimeZone["UTC"], validation_alias=AliasChoices("tz"))
+    timezone: TimeZone = Field(default="UTC", validation_alias=AliasChoices("tz"))
 
     # Discord Settings
     discord_bot_token: SecretStr | None = None
@@ -54,11 +67,27 @@ class Settings(BaseSettings):
     postgres_port: int = 5432
     postgres_db: str = "postgres"
     postgres_apscheduler_schema: str = "apscheduler"
+    postgres_pool_size: int = Field(
+        default=10, description="The number of database connections kept open, and opened up front at startup."
+    )
+    postgres_max_overflow: int = Field(
+        default=20, description="How many extra database connections may be opened when the pool is busy."
+    )
+    postgres_pool_recycle_seconds: int = Field(
+        default=300, description="Database connections older than this are replaced rather than reused."
+    )
 
     # OpenAI Settings
     openai_key: SecretStr | None = None
     openai_model: str = "gpt-4o"
     openai_fallback_model: str = "gpt-4o-mini"
+    openai_max_retries: int = Field(
+        default=5,
+        description=(
+            "How many times OpenAI requests are retried on rate limits, timeouts, connection errors and 5xx responses. "
+            "Retries back off exponentially with jitter and honor the Retry-After header."
+        ),
+    )
     openai_assistant_name: str = "Grug"
     openai_assistant_instructions: str = "\n".join(
         [
@@ -84,15 +113,9 @@ class Settings(BaseSettings):
     openai_image_default_model: str = "dall-e-3"
 
     @computed_field
-    @property
-    def root_dir(self) -> Path:
-        """Get the root directory of the project."""
-        return _ROOT_DIR
-
-    @computed_field
-    @property
+    @cached_property
     def postgres_dsn(self) -> str:
-        """Get the Postgres DSN."""
+        """Get the Postgres DSN, built once since the settings it comes from do not change at runtime."""
         return str(
             PostgresDsn.build(
                 scheme="postgresql+psycopg",
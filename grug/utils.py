@@ -1,15 +1,18 @@
 import datetime
 import logging
+from typing import ClassVar
 
 import discord
 import pytz
 from loguru import logger
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlmodel import select
 
-from grug.models import Group
+from grug.models import Group, User, get_timezone
 from grug.models_crud import get_distinct_users_who_last_brought_food
 
+# The logging module's frames are skipped when finding the caller of a log record
+_LOGGING_FILE = logging.__file__
+
 
 class InterceptLogHandler(logging.Handler):
     """
@@ -17,22 +20,31 @@ class InterceptLogHandler(logging.Handler):
     See https://loguru.readthedocs.io/en/stable/overview.html#entirely-compatible-with-standard-logging
     """
 
+    # Loguru level names resolved from standard logging level names, so the lookup is done once per level
+    _levels: ClassVar[dict[str, str | int]] = {}
+
     def emit(self, record: logging.LogRecord):
         """Intercept standard logging records."""
         # Get corresponding Loguru level if it exists
-        try:
-            level = logger.level(record.levelname).name
-        except ValueError:
-            level = record.levelno
+        level = self._levels.get(record.levelname)
+        if level is None:
+            try:
+                level = logger.level(record.levelname).name
+            except ValueError:
+                level = record.levelno
+            self._levels[record.levelname] = level
 
         # Find caller from where originated the logged message
         frame, depth = logging.currentframe(), 2
-        while frame.f_code.co_filename == logging.__file__:
+        while frame.f_code.co_filename == _LOGGING_FILE:
             if frame.f_back:
                 frame = frame.f_back
                 depth += 1
 
-        logger.opt(depth=depth, exception=record.exc_info).log(level, record.getMessage())
+        # Records without args are already the final message, so the % formatting in getMessage is skipped for them
+        message = record.getMessage() if record.args else str(record.msg)
+
+        logger.opt(depth=depth, exception=record.exc_info).log(level, message)
 
 
 def get_interaction_response(interaction: discord.Interaction) -> discord.InteractionResponse:
@@ -44,26 +56,25 @@ def get_interaction_response(interaction: discord.Interaction) -> discord.Intera
 
 
 async def get_food_assignment_log_text(group_id: int, db_session: AsyncSession) -> str:
-    # noinspection Pydantic
-    group: Group = (await db_session.execute(select(Group).where(Group.id == group_id))).scalars().one_or_none()
+    group: Group = await db_session.get(Group, group_id)
     food_history = await get_distinct_users_who_last_brought_food(group_id, db_session)
 
     # If there is no food history, return an empty string
     if len(food_history) == 0:
         return ""
 
-    message = "\n- "
+    group_timezone = get_timezone(group.timezone)
+    now = datetime.datetime.now(tz=pytz.utc)
 
-    food_log: list[str] = []
-    for user, timestamp in food_history:
-        list_item = f"{timestamp.astimezone(pytz.timezone(group.timezone)).date().isoformat()}: {user.friendly_name}"
+    def format_food_log_item(user: User, timestamp: datetime.datetime) -> str:
+        """Format a food log item, bolding it and marking it "(Assigned)" if its date is in the future."""
+        list_item = f"{timestamp.astimezone(group_timezone).date().isoformat()}: {user.friendly_name}"
 
         # If the timestamp is in the future, mark it as assigned and bold
-        if timestamp > datetime.datetime.now(tz=pytz.utc):
+        if timestamp > now:
             list_item = f"**{list_item} (Assigned)**"
 
-        food_log.append(list_item)
-
-    message += "\n- ".join(food_log)
+        return list_item
 
-    return message
+    # The message is built with a single join over the items, rather than collecting them into a list first
+    return "\n- " + "\n- ".join(format_food_log_item(user, timestamp) for user, timestamp in food_history)
@@ -7,8 +7,7 @@ from grug.db import async_session
 
 def pytest_sessionstart(session):
     # TODO: configure to use sqlite for local development and testing, when postgres is not available
-    os.environ["POSTGRES_USER"] = "fake-pg-user"
-    os.environ["POSTGRES_PASSWORD"] = "fake-pg-password"
+    os.environ.update({"POSTGRES_USER": "fake-pg-user", "POSTGRES_PASSWORD": "fake-pg-password"})
 
 
 @pytest.fixture(scope="package", autouse=True)
@@ -0,0 +1,56 @@
+from datetime import datetime, time, timezone
+
+from grug import models
+from grug.models import GameSessionEvent, Group, User, UserGameSessionEventRsvp, get_cron_next_fire_time
+
+
+def test_user_validated_update():
+    user = User(username="grug")
+    user.validated_update(first_name="  grug ", last_name=" the barbarian", phone="(555) 555-1234")
+
+    assert user.first_name == "Grug"
+    assert user.last_name == "The Barbarian"
+    assert user.phone == "+15555551234"
+
+
+def test_get_cron_next_fire_time():
+    next_fire_time = get_cron_next_fire_time("0 17 * * sun")
+
+    assert next_fire_time > datetime.now(timezone.utc)
+    assert get_cron_next_fire_time("0 17 * * sun") is next_fire_time
+
+    # A fire time that has already passed is recomputed
+    models._cron_next_fire_times["0 17 * * sun"] = datetime(2000, 1, 1, tzinfo=timezone.utc)
+    assert get_cron_next_fire_time("0 17 * * sun") == next_fire_time
+
+
+def test_game_session_event_user_attendance_summary_md():
+    group = Group(name="grug's group", discord_guild_id=1, timezone="America/Chicago")
+    game_session_event = GameSessionEvent(
+        group=group,
+        timestamp=datetime(2026, 10, 18, 22, tzinfo=timezone.utc),
+        rsvps=[
+            UserGameSessionEventRsvp(user=User(username="grug"), attending=True),
+            UserGameSessionEventRsvp(user=User(username="ugg"), attending=False),
+            UserGameSessionEventRsvp(user=User(username="zog", first_name="Zog"), attending=True),
+        ],
+    )
+
+    assert game_session_event.get_user_attendance_summary_md() == (
+        "## Attendance 2026-10-18\n**RSVP Yes**\n- grug\n- Zog\n\n**RSVP No**\n- ugg"
+    )
+
+
+def test_game_session_event_reminder_datetime():
+    group = Group(
+        name="grug's group",
+        discord_guild_id=1,
+        timezone="America/Chicago",
+        game_session_cron_schedule="0 20 * * sat",
+        game_session_reminder_days_before_event=3,
+        game_session_reminder_time=time(hour=11),
+    )
+    # Saturday 8pm in Chicago, which is already Sunday in UTC
+    game_session_event = GameSessionEvent(group=group, timestamp=datetime(2026, 10, 18, 1, tzinfo=timezone.utc))
+
+    assert game_session_event.reminder_datetime == datetime(2026, 10, 14, 16, tzinfo=timezone.utc)
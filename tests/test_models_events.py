@@ -0,0 +1,21 @@
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from grug import models_events
+from grug.models import Group
+
+
+def test_sync_session_commit_without_event_loop():
+    engine = create_engine("sqlite://")
+    Group.__table__.create(engine)
+
+    with Session(engine) as session:
+        # A commit without any group changes does nothing
+        session.commit()
+
+        # Group changes committed outside an event loop skip the schedule updates, rather than failing the commit
+        session.add(Group(name="grug's group", discord_guild_id=1))
+        session.commit()
+
+    assert models_events._DIRTY_GROUP_IDS_KEY not in session.info
+    assert models_events._pending_schedule_updates == {}